@@ -0,0 +1,153 @@
+# batch_predict.py
+# 여러 장(또는 ZIP) 이미지를 배치로 분류: 디코딩은 스레드 풀, 추론은 test_dl/get_preds 한 번에.
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from itertools import islice
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from imaging import decode_image, thumbnail_data_uri
+from pred_cache import cache_key
+
+IMG_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff")
+MAX_MEMBER_BYTES = 25 * 1024 * 1024  # ZIP 항목 하나의 압축 해제 크기 상한 (추론 서버 MAX_BODY_BYTES와 같음)
+
+
+def _is_image_name(name: str) -> bool:
+    base = os.path.basename(name)
+    return (name.lower().endswith(IMG_EXTS)
+            and not base.startswith(".") and "__MACOSX/" not in name)
+
+
+def _open_zip(data: bytes) -> zipfile.ZipFile | None:
+    try:
+        return zipfile.ZipFile(BytesIO(data))
+    except (zipfile.BadZipFile, OSError, ValueError):
+        return None
+
+
+def iter_uploaded_images(files) -> Iterator[tuple[str, bytes | Exception]]:
+    """업로드 파일들(.name/.getvalue())에서 (이름, 바이트)를 하나씩 꺼낸다. ZIP은 풀어서.
+
+    깨진 ZIP이나 읽을 수 없는 항목은 바이트 대신 예외를 넘겨 표에 오류 행으로 남긴다 (배치 전체는 계속).
+    """
+    for f in files:
+        data = f.getvalue()
+        if not f.name.lower().endswith(".zip"):
+            yield f.name, data
+            continue
+        zf = _open_zip(data)
+        if zf is None:
+            yield f.name, zipfile.BadZipFile("File is not a zip file")
+            continue
+        with zf:
+            for info in zf.infolist():
+                if info.is_dir() or not _is_image_name(info.filename):
+                    continue
+                if info.file_size > MAX_MEMBER_BYTES:  # 압축 폭탄: 메모리에 풀기 전에 거절
+                    yield (f"{f.name}/{info.filename}",
+                           ValueError(f"member too large ({info.file_size} > {MAX_MEMBER_BYTES} bytes)"))
+                    continue
+                try:
+                    member = zf.read(info)  # ZipExtFile은 file_size까지만 풀고 CRC를 확인한다
+                except Exception as e:  # CRC 오류, 암호화/미지원 압축 등
+                    member = e
+                yield f"{f.name}/{info.filename}", member
+
+
+def count_uploaded_images(files) -> int:
+    n = 0
+    for f in files:
+        zf = _open_zip(f.getvalue()) if f.name.lower().endswith(".zip") else None
+        if zf is None:
+            n += 1  # 일반 이미지, 또는 깨진 ZIP (오류 행 하나)
+            continue
+        with zf:
+            n += sum(1 for i in zf.infolist() if not i.is_dir() and _is_image_name(i.filename))
+    return n
+
+
+def _chunks(it: Iterable, n: int):
+    it = iter(it)
+    while chunk := list(islice(it, n)):
+        yield chunk
+
+
+def _decode(item, target_size=None):
+    name, b = item
+    if isinstance(b, Exception):
+        return name, b, None, f"{type(b).__name__}: {b}"
+    try:
+        pil = decode_image(b, target_size)
+        return name, b, pil, None
+    except Exception as e:  # 깨진 파일은 건너뛰고 표에 오류로 표시
+        return name, b, None, f"{type(e).__name__}: {e}"
+
+
+def _error_row(name, err: str):
+    return {"thumbnail": None, "file": name, "label": None, "prob": None, "top_k": "", "error": err}
+
+
+def _row(name, pil, pred, probs, labels, topk):
+    probs = np.asarray(probs, dtype=np.float32)
+    order = np.argsort(-probs)[:topk]
+    return {
+        "thumbnail": thumbnail_data_uri(pil),
+        "file": name,
+        "label": str(pred),
+        "prob": float(probs[order[0]]),
+        "top_k": " · ".join(f"{labels[i]} {probs[i]:.3f}" for i in order),
+        "error": "",
+    }
+
+
+def predict_probs(learner, pils, batch_size: int = 32) -> np.ndarray:
+    """PIL 이미지 리스트를 test_dl/get_preds로 한 번에 추론해 (n, 클래스 수) 확률 배열로 반환."""
+    from fastai.vision.all import PILImage  # 무거운 import는 실제 추론 시점에
+
+    dl = learner.dls.test_dl([PILImage.create(p) for p in pils], bs=batch_size, num_workers=0)
+    with learner.no_bar():
+        preds, _ = learner.get_preds(dl=dl)
+    return preds.numpy()
+
+
+def predict_batches(items: Iterable[tuple[str, bytes]], labels: list[str], predict_fn,
+                    batch_size: int = 32, topk: int = 3, workers: int | None = None,
+                    cache=None, model_id: str | None = None, target_size: int | None = None):
+    """(이름, 바이트) 이터러블을 batch_size씩 분류하고, 배치가 끝날 때마다 결과 행 리스트를 yield.
+
+    predict_fn은 [(바이트, PIL)] 리스트를 받아 (n, 클래스 수) 확률 배열을 반환한다
+    (로컬: predict_probs, 원격: InferenceClient.predict_probs). 원격처럼 이미지별로 실패할 수 있으면
+    해당 자리에 확률 대신 예외를 넣어 돌려주면 그 이미지만 오류 행이 된다.
+    target_size(모델 입력 크기)가 주어지면 그 크기 근처로만 디코딩한다.
+    cache(PredictionCache)와 model_id가 주어지면 이미 본 이미지는 건너뛰고 새 결과는 캐시에 넣는다.
+    """
+    workers = workers or min(4, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for chunk in _chunks(items, batch_size):
+            rows, todo = [], []
+            for name, b, pil, err in ex.map(partial(_decode, target_size=target_size), chunk):
+                if err:
+                    rows.append(_error_row(name, err))
+                    continue
+                key = cache_key(b, model_id) if cache is not None and model_id else None
+                hit = cache.get(key) if key else None
+                if hit is not None:
+                    rows.append(_row(name, pil, hit[0], hit[2], labels, topk))
+                else:
+                    todo.append((name, b, pil, key))
+            if todo:
+                probs = predict_fn([(b, pil) for _, b, pil, _ in todo])
+                for (name, _, pil, key), p in zip(todo, probs):
+                    if isinstance(p, Exception):  # 원격 추론에서 이 이미지만 실패 (예: 서버 과부하)
+                        rows.append(_error_row(name, f"{type(p).__name__}: {p}"))
+                        continue
+                    idx = int(np.argmax(p))
+                    if key:
+                        cache.put(key, labels[idx], idx, p)
+                    rows.append(_row(name, pil, labels[idx], p, labels, topk))
+            yield rows
@@ -0,0 +1,297 @@
+# benchmark.py
+# 오프라인 벤치마크: 디코딩 → 전처리 → 예측 → 렌더링 단계별 지연시간/처리량/메모리
+# 브라우저나 네트워크 없이 돈다. 입력 이미지는 합성하고, model.pkl이 없으면 작은 대체 모델을 만든다.
+#
+#   python benchmark.py run --out bench.json --threads 1 2 4 --concurrency 1 4
+#   python benchmark.py compare base.json bench.json --max-regression 0.10   # 회귀/빠진 케이스/비교 0건이면 exit 1
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from engines import DEFAULT_EXPORT_DIR, ENGINES, load_engine
+from imaging import decode_image, load_pil_from_bytes
+from model_loader import DEFAULT_MODEL_PATH
+from render_html import prob_list_html, sorted_probs
+
+RESOLUTIONS = [(640, 480), (1920, 1080), (4032, 3024)]
+QUICK_RESOLUTIONS = [(640, 480), (1920, 1080)]
+FORMATS = {"jpeg": {"format": "JPEG", "quality": 90}, "png": {"format": "PNG"},
+           "webp": {"format": "WEBP", "quality": 90}, "tiff": {"format": "TIFF"}}
+
+
+# ======================
+# 입력 / 대체 모델
+# ======================
+def synth_image(w: int, h: int, seed: int = 0) -> Image.Image:
+    """그라디언트 + 노이즈 이미지. 작게 만든 뒤 키워서 큰 해상도에서도 메모리를 적게 쓴다."""
+    rng = np.random.default_rng(seed)
+    sw, sh = min(w, 512), min(h, 384)
+    gx, gy = np.meshgrid(np.linspace(0, 255, sw), np.linspace(0, 255, sh))
+    base = np.stack([gx, gy, (gx + gy) / 2], axis=-1)
+    noise = rng.integers(-40, 40, size=(sh, sw, 3))
+    small = Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return small.resize((w, h), Image.BICUBIC) if (sw, sh) != (w, h) else small
+
+
+def synth_inputs(resolutions) -> dict[tuple[str, int, int], bytes]:
+    out = {}
+    for w, h in resolutions:
+        img = synth_image(w, h, seed=w * h)
+        for name, opts in FORMATS.items():
+            buf = BytesIO()
+            try:
+                img.save(buf, **opts)
+            except (KeyError, OSError):  # 이 Pillow 빌드에서 지원하지 않는 포맷 (예: WebP)
+                continue
+            out[(name, w, h)] = buf.getvalue()
+    return out
+
+
+def make_standin_model(workdir: str, n_classes: int = 3, size: int = 224) -> str:
+    """학습하지 않은 작은 CNN으로 fastai learner를 만들어 export한 경로를 반환."""
+    from fastai.vision.all import (CrossEntropyLossFlat, ImageDataLoaders, Learner, Normalize, Resize,
+                                   imagenet_stats)
+    from torch import nn
+
+    fnames, lbls = [], []
+    for c in range(n_classes):
+        for j in range(3):
+            p = os.path.join(workdir, f"class{c}_{j}.jpg")
+            synth_image(96, 96, seed=c * 10 + j).save(p)
+            fnames.append(p)
+            lbls.append(f"class{c}")
+    dls = ImageDataLoaders.from_lists(workdir, fnames, lbls, valid_pct=0.34, seed=0, item_tfms=Resize(size),
+                                      batch_tfms=Normalize.from_stats(*imagenet_stats), bs=2, num_workers=0)
+    model = nn.Sequential(
+        nn.Conv2d(3, 16, 3, stride=2, padding=1), nn.ReLU(),
+        nn.Conv2d(16, 32, 3, stride=2, padding=1), nn.ReLU(),
+        nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(32, dls.c),
+    )
+    path = os.path.join(workdir, "standin_model.pkl")
+    Learner(dls, model, loss_func=CrossEntropyLossFlat()).export(path)
+    return path
+
+
+# ======================
+# 측정
+# ======================
+def peak_rss_mb() -> float:
+    """프로세스 전체의 최대 RSS (ru_maxrss는 줄어들지 않으므로 단계별 값으로는 쓸 수 없다)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024  # macOS는 바이트, Linux는 KB
+
+
+def measure(fn, calls: int, concurrency: int = 1, warmup: int = 1):
+    """fn을 concurrency개 스레드로 calls번 호출. (호출별 지연 ms 리스트, 전체 경과 초)."""
+    for _ in range(warmup):
+        fn()
+
+    def one(_):
+        t0 = time.perf_counter()
+        fn()
+        return (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        lat = list(ex.map(one, range(calls)))
+    return lat, time.perf_counter() - t0
+
+
+def summarize(stage: str, params: dict, lat_ms: list[float], wall_s: float, items_per_call: int = 1) -> dict:
+    a = np.asarray(lat_ms)
+    return {
+        "stage": stage,
+        "params": params,
+        "n": len(lat_ms),
+        "mean_ms": float(a.mean()),
+        "p50_ms": float(np.percentile(a, 50)),
+        "p95_ms": float(np.percentile(a, 95)),
+        "p99_ms": float(np.percentile(a, 99)),
+        "throughput_per_s": len(lat_ms) * items_per_call / wall_s if wall_s > 0 else 0.0,
+    }
+
+
+def run(args) -> dict:
+    import torch
+    from model_loader import STARTUP_PHASES
+
+    results = []
+
+    def record(stage, params, fn, calls, concurrency=1, items_per_call=1):
+        lat, wall = measure(fn, calls, concurrency)
+        r = summarize(stage, params, lat, wall, items_per_call)
+        results.append(r)
+        print(f"{stage:<14} {json.dumps(params, ensure_ascii=False):<60} "
+              f"p50 {r['p50_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  {r['throughput_per_s']:8.1f}/s",
+              file=sys.stderr)
+
+    model_path = args.model_path
+    standin = not os.path.exists(model_path)
+    with tempfile.TemporaryDirectory(prefix="ai3-bench-") as workdir:  # 대체 모델은 로드 후 지운다
+        if standin and args.engine == "fastai":
+            model_path = make_standin_model(workdir)
+        engine = load_engine(args.engine, "", model_path, args.export_dir)
+    size = engine.input_size or 224
+
+    inputs = synth_inputs(QUICK_RESOLUTIONS if args.quick else RESOLUTIONS)
+    repeat = args.repeat
+
+    # 1) 디코딩 (torch 스레드와 무관)
+    for (fmt, w, h), b in inputs.items():
+        params = {"format": fmt, "resolution": f"{w}x{h}", "bytes": len(b)}
+        record("decode_full", params, lambda b=b: load_pil_from_bytes(b), repeat)
+        record("decode_sized", {**params, "target": size}, lambda b=b: decode_image(b, size), repeat)
+
+    # 2) 렌더링 (확률 막대 HTML)
+    for n_labels in (len(engine.labels), 100, 1000):
+        labels = engine.labels if n_labels == len(engine.labels) else [f"label{i}" for i in range(n_labels)]
+        probs = np.random.default_rng(0).dirichlet(np.ones(len(labels)))
+        def render(labels=labels, probs=probs):
+            prob_list = sorted_probs(labels, probs)
+            return prob_list_html(prob_list, prob_list[0][0])
+        record("render_html", {"labels": len(labels)}, render, repeat)
+
+    # 3) 전처리/예측/배치 추론 (torch 스레드 수 × 동시성)
+    ref = inputs.get(("jpeg", 1920, 1080)) or next(iter(inputs.values()))
+    pil = decode_image(ref, size)
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        if args.engine == "fastai":
+            from fastai.vision.all import PILImage
+            learner = engine.learner
+            def prep():
+                learner.dls.test_dl([PILImage.create(pil)], num_workers=0).one_batch()
+        else:
+            from engines import preprocess
+            def prep():
+                preprocess(pil, engine.meta)
+        record("preprocess", {"threads": threads}, prep, repeat)
+        if args.engine == "fastai":  # predict와 같은 계산을 learner.predict 그대로 (디코딩 제외)
+            record("learner_predict", {"threads": threads},
+                   lambda: learner.predict(PILImage.create(pil)), repeat)
+        for conc in args.concurrency:
+            record("predict", {"threads": threads, "concurrency": conc},
+                   lambda: engine.predict(pil), repeat, conc)
+        for bs in args.batch_sizes:
+            record("batch_predict", {"threads": threads, "batch_size": bs},
+                   lambda bs=bs: engine.predict_probs([pil] * bs), max(3, repeat // 4), 1, bs)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "engine": engine.name,
+            "model": "standin" if standin and args.engine == "fastai" else model_path,
+            "input_size": size,
+            "repeat": repeat,
+            "startup": dict(STARTUP_PHASES),
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+
+
+# ======================
+# 비교
+# ======================
+KEY_IGNORE = ("bytes",)  # 인코더(Pillow/libjpeg) 버전에 따라 바뀌는 값은 비교 키에서 뺀다
+
+
+def _key(r: dict) -> tuple:
+    params = {k: v for k, v in r["params"].items() if k not in KEY_IGNORE}
+    return r["stage"], json.dumps(params, sort_keys=True)
+
+
+def compare(base: dict, head: dict, metrics=("p95_ms", "throughput_per_s"), max_regression: float = 0.10):
+    """두 실행 결과를 (stage, params)로 맞춰 비교. 지연(_ms)은 증가, 처리량은 감소가 회귀.
+
+    (행 리스트, 회귀 행 리스트, head에 없는 base 케이스 리스트)를 반환한다. 비율은 head/base - 1.
+    """
+    head_by = {_key(r): r for r in head["results"]}
+    rows, regressions, missing = [], [], []
+    for b in base["results"]:
+        r = head_by.get(_key(b))
+        if r is None:
+            missing.append({"stage": b["stage"], "params": b["params"]})
+            continue
+        for m in metrics:
+            if not b.get(m):
+                continue
+            change = r[m] / b[m] - 1.0
+            worse = change > max_regression if m.endswith("_ms") else -change > max_regression
+            row = {"stage": r["stage"], "params": r["params"], "metric": m,
+                   "base": b[m], "head": r[m], "change": change, "regression": worse}
+            rows.append(row)
+            if worse:
+                regressions.append(row)
+    return rows, regressions, missing
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="이미지 분류 파이프라인 오프라인 벤치마크")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="벤치마크 실행 (JSON 출력)")
+    r.add_argument("--model-path", default=DEFAULT_MODEL_PATH, help="없으면 대체 모델 사용 (fastai 엔진)")
+    r.add_argument("--engine", choices=ENGINES, default="fastai")
+    r.add_argument("--export-dir", default=DEFAULT_EXPORT_DIR)
+    r.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    r.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    r.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    r.add_argument("--repeat", type=int, default=20)
+    r.add_argument("--quick", action="store_true", help="12MP 해상도 생략")
+    r.add_argument("--out", default="-", help="결과 JSON 경로 (기본: stdout)")
+
+    c = sub.add_parser("compare", help="두 결과 비교, 회귀가 있으면 exit 1")
+    c.add_argument("base")
+    c.add_argument("head")
+    c.add_argument("--metric", nargs="+", default=["p95_ms", "throughput_per_s"])
+    c.add_argument("--max-regression", type=float, default=0.10, help="허용 악화 비율 (0.10 = 10%%)")
+
+    args = p.parse_args(argv)
+    if args.cmd == "run":
+        report = run(args)
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.out == "-":
+            print(text)
+        else:
+            with open(args.out, "w", encoding="utf-8") as fh:
+                fh.write(text)
+        return 0
+
+    with open(args.base, encoding="utf-8") as fh:
+        base = json.load(fh)
+    with open(args.head, encoding="utf-8") as fh:
+        head = json.load(fh)
+    rows, regressions, missing = compare(base, head, args.metric, args.max_regression)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['stage']:<14} {json.dumps(row['params'], ensure_ascii=False):<50} {row['metric']:<17} "
+              f"{row['base']:10.2f} → {row['head']:10.2f} ({row['change']:+.1%}) {flag}")
+    for m in missing:
+        print(f"{m['stage']:<14} {json.dumps(m['params'], ensure_ascii=False):<50} MISSING in head")
+    rss = [run_.get("meta", {}).get("peak_rss_mb") for run_ in (base, head)]
+    if all(rss):
+        print(f"peak RSS {rss[0]:.1f} MB → {rss[1]:.1f} MB")
+    print(f"{len(regressions)} regression(s) over {args.max_regression:.0%} in {len(rows)} comparisons, "
+          f"{len(missing)} base case(s) missing from head")
+    if not rows:
+        print("nothing was compared (metrics/cases do not match)", file=sys.stderr)
+    return 1 if regressions or missing or not rows else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
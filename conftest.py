@@ -0,0 +1,2 @@
+# conftest.py
+# 테스트에서 저장소 최상위 모듈(pred_cache, imaging, ...)을 바로 import할 수 있게 한다.
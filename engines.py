@@ -0,0 +1,181 @@
+# engines.py
+# 추론 엔진: fastai(learner.predict) / TorchScript / ONNX Runtime (+ int8 동적 양자화 버전)
+# 내보낸 엔진은 export_model.py가 만든 폴더(model.ts, model.onnx, meta.json ...)를 읽는다.
+# meta.json에는 라벨(dls.vocab)과 전처리(리사이즈 방식/크기)가 들어 있고,
+# 정규화(mean/std)와 softmax는 내보낸 그래프 안에 포함되어 있다.
+import json
+import math
+import os
+
+import numpy as np
+from PIL import Image
+
+from imaging import model_input_size
+from metrics import no_span
+from pred_cache import model_identity
+
+DEFAULT_EXPORT_DIR = "model_export"
+META_FILE = "meta.json"
+ENGINE_FILES = {
+    "torchscript": "model.ts",
+    "torchscript-int8": "model.int8.ts",
+    "onnx": "model.onnx",
+    "onnx-int8": "model.int8.onnx",
+}
+ENGINES = ("fastai",) + tuple(ENGINE_FILES)
+
+
+class FastaiEngine:
+    """기존 경로: fastai learner를 그대로 사용.
+
+    predict()는 learner.predict와 같은 계산(test_dl 전처리 → model → loss_func.activation)을
+    단계별로 나눠 수행해 전처리와 forward 시간을 따로 잴 수 있게 한다.
+    """
+    name = "fastai"
+
+    def __init__(self, learner, model_path: str):
+        self.learner = learner
+        self.learner.model.eval()
+        self.labels = [str(x) for x in learner.dls.vocab]
+        self.input_size = model_input_size(learner)
+        self.model_id = model_identity(model_path)
+        self._activation = getattr(learner.loss_func, "activation", None)
+
+    def predict(self, pil: Image.Image, span=no_span):
+        import torch
+        from fastai.vision.all import PILImage
+        with span("preprocess"):
+            xb = self.learner.dls.test_dl([PILImage.create(pil)], num_workers=0).one_batch()[0]
+        with span("forward"):
+            with torch.inference_mode():
+                out = self.learner.model(xb)
+                probs = (self._activation(out) if self._activation else out)[0]
+        idx = int(probs.argmax())
+        return self.labels[idx], idx, probs
+
+    def predict_probs(self, pils) -> np.ndarray:
+        from batch_predict import predict_probs
+        return predict_probs(self.learner, pils, max(1, len(pils)))
+
+
+_NP_PAD_MODES = {"zeros": "constant", "border": "edge", "reflection": "reflect"}  # fastai PadMode → np.pad
+
+
+def _crop_pad(pil: Image.Image, sz, tl, pad_mode: str = "zeros", resize_to=None,
+              resample: int = Image.BILINEAR) -> Image.Image:
+    """fastai crop_pad(PIL)과 같은 계산: 좌상단 tl에서 sz(w, h) 영역을 잘라내고,
+    원본 밖으로 나간 부분은 pad_mode로 채운 뒤 resize_to로 리사이즈."""
+    (pw, ph), (cw, ch), (left, top) = pil.size, sz, tl
+    box = (max(left, 0), max(top, 0), min(left + cw, pw), min(top + ch, ph))
+    if box != (0, 0, pw, ph):
+        pil = pil.crop(box)
+    pad = (max(-left, 0), max(-top, 0), max(left + cw - pw, 0), max(top + ch - ph, 0))
+    if any(pad):
+        arr = np.pad(np.asarray(pil), ((pad[1], pad[3]), (pad[0], pad[2]), (0, 0)), mode=_NP_PAD_MODES[pad_mode])
+        pil = Image.fromarray(arr)
+    if resize_to is not None:
+        pil = pil.resize(tuple(resize_to), resample)
+    return pil
+
+
+def preprocess(pil: Image.Image, meta: dict) -> np.ndarray:
+    """fastai 검증 시 item transform(Resize의 crop/pad/squish, RandomResizedCrop)과 같은 계산으로
+    (3, H, W) uint8 배열을 만든다. meta는 export_model.preprocess_meta가 만든 dict."""
+    w, h = meta["size"]
+    resample = int(meta.get("resample", Image.BILINEAR))
+    pw, ph = pil.size
+    if meta.get("transform", "Resize") == "RandomResizedCrop":
+        # 검증 시에는 전체 이미지를 size + xtra로 리사이즈한 뒤 중앙을 size만큼 자른다
+        xtra = math.ceil(max(w, h) * float(meta.get("val_xtra", 0.14)) / 8) * 8
+        im = pil.resize((w + xtra, h + xtra), resample)
+        im = _crop_pad(im, (w, h), (xtra // 2, xtra // 2))
+    elif meta.get("method", "crop") == "squish":
+        im = pil.resize((w, h), resample)
+    else:  # crop: 목표 비율로 중앙을 잘라냄 / pad: 목표 비율이 되도록 바깥을 채움
+        pad = meta.get("method") == "pad"
+        rw, rh = pw / w, ph / h
+        m = rw if ((rw > rh) if pad else (rw < rh)) else rh
+        cw, ch = int(m * w), int(m * h)
+        tl = (int(0.5 * (pw - cw)), int(0.5 * (ph - ch)))
+        # 예전 meta.json에는 pad_mode가 없다 (그때는 0으로 채웠음)
+        im = _crop_pad(pil, (cw, ch), tl, meta.get("pad_mode", "zeros"), (w, h), resample)
+    return np.asarray(im, dtype=np.uint8).transpose(2, 0, 1)
+
+
+class _ExportedEngine:
+    def __init__(self, name: str, export_dir: str):
+        self.name = name
+        self.path = os.path.join(export_dir, ENGINE_FILES[name])
+        with open(os.path.join(export_dir, META_FILE), encoding="utf-8") as fh:
+            self.meta = json.load(fh)
+        self.labels = [str(x) for x in self.meta["vocab"]]
+        self.input_size = max(self.meta["size"])
+        self.model_id = model_identity(self.path)
+
+    def _run(self, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_probs(self, pils) -> np.ndarray:
+        x = np.stack([preprocess(p, self.meta) for p in pils]).astype(np.float32)
+        return self._run(x)
+
+    def predict(self, pil: Image.Image, span=no_span):
+        with span("preprocess"):
+            x = preprocess(pil, self.meta)[None].astype(np.float32)
+        with span("forward"):
+            probs = self._run(x)[0]
+        idx = int(np.argmax(probs))
+        return self.labels[idx], idx, probs
+
+
+class TorchScriptEngine(_ExportedEngine):
+    def __init__(self, name: str, export_dir: str):
+        super().__init__(name, export_dir)
+        import torch
+        self._torch = torch
+        self.module = torch.jit.load(self.path, map_location="cpu").eval()
+
+    def _run(self, x):
+        with self._torch.inference_mode():
+            return self.module(self._torch.from_numpy(x)).numpy()
+
+
+class OnnxEngine(_ExportedEngine):
+    def __init__(self, name: str, export_dir: str):
+        super().__init__(name, export_dir)
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(self.path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _run(self, x):
+        return self.session.run(None, {self.input_name: x})[0]
+
+
+def load_engine(name: str, file_id: str, model_path: str, export_dir: str = DEFAULT_EXPORT_DIR,
+                sha256: str | None = None):
+    """엔진 이름으로 엔진 생성. 내보낸 파일이 없으면 FileNotFoundError (export_model.py 먼저 실행)."""
+    if name == "fastai":
+        from model_loader import load_model
+        return FastaiEngine(load_model(file_id, model_path, sha256), model_path)
+    if name not in ENGINE_FILES:
+        raise ValueError(f"unknown engine {name!r} (choose from {', '.join(ENGINES)})")
+    path = os.path.join(export_dir, ENGINE_FILES[name])
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `python export_model.py export` first")
+    return (OnnxEngine if name.startswith("onnx") else TorchScriptEngine)(name, export_dir)
+
+
+def warm_up(engine):
+    """더미 이미지로 한 번 추론해 첫 실제 요청이 지연 초기화 비용을 떠안지 않도록 한다."""
+    s = engine.input_size or 224
+    engine.predict_probs([Image.new("RGB", (s, s))])
+
+
+def load_and_warm(name: str, file_id: str, model_path: str, export_dir: str = DEFAULT_EXPORT_DIR,
+                  sha256: str | None = None):
+    from model_loader import timed
+    with timed("load_engine"):
+        engine = load_engine(name, file_id, model_path, export_dir, sha256)
+    with timed("warmup"):
+        warm_up(engine)
+    return engine
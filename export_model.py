@@ -0,0 +1,243 @@
+# export_model.py
+# model.pkl(fastai learner) → 독립 실행 가능한 TorchScript / ONNX 파일 (+ int8 동적 양자화 버전)
+#
+#   python export_model.py export --format torchscript onnx --quantize
+#   python export_model.py parity --samples sample_images/ --engine torchscript onnx-int8
+#
+# parity는 샘플 이미지(하위 폴더 이름 = 정답 라벨, 없으면 정확도 생략)로 fastai 엔진과 비교해
+# top-1 일치율, 확률 차이(drift), 정확도, 이미지당 지연시간을 JSON으로 출력한다.
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+from torch import nn
+
+from batch_predict import IMG_EXTS
+from engines import DEFAULT_EXPORT_DIR, ENGINE_FILES, META_FILE, load_engine, warm_up
+from imaging import decode_image, model_input_size
+from model_loader import DEFAULT_FILE_ID, DEFAULT_MODEL_PATH, load_model
+from pred_cache import model_identity
+
+
+class _Exported(nn.Module):
+    """정규화 + 모델 + 활성화(softmax/sigmoid)를 한 그래프로 묶음. 입력은 0~255 float (N, 3, H, W)."""
+
+    def __init__(self, model: nn.Module, mean, std, sigmoid: bool = False):
+        super().__init__()
+        self.model = model
+        self.sigmoid = sigmoid
+        self.register_buffer("mean", torch.tensor(mean, dtype=torch.float32).view(1, -1, 1, 1) * 255.0)
+        self.register_buffer("std", torch.tensor(std, dtype=torch.float32).view(1, -1, 1, 1) * 255.0)
+
+    def forward(self, x):
+        out = self.model((x - self.mean) / self.std)
+        return torch.sigmoid(out) if self.sigmoid else torch.softmax(out, dim=1)
+
+
+_ITEM_NOOP = ("ToTensor",)
+_BATCH_NOOP = ("IntToFloatTensor", "Normalize")
+
+
+def _unsupported(tfm, where: str) -> ValueError:
+    return ValueError(f"{where} transform {type(tfm).__name__} is applied at inference time and cannot be "
+                      f"reproduced by the exported engines (engines.preprocess); refusing to export")
+
+
+def preprocess_meta(learner) -> dict:
+    """learner의 transform에서 검증 시 전처리(Resize/RandomResizedCrop 설정), Normalize 통계, vocab을 읽는다.
+
+    검증 시에도 적용되는데 engines.preprocess로 재현할 수 없는 transform이 있으면 ValueError.
+    """
+    meta = {"transform": "Resize", "size": None, "method": "crop", "pad_mode": "zeros",
+            "resample": int(Image.BILINEAR)}
+    for tfm in getattr(learner.dls.after_item, "fs", []):
+        name = type(tfm).__name__
+        if name in ("Resize", "RandomResizedCrop"):
+            meta.update(transform=name, size=[int(s) for s in tfm.size],  # fastai size는 (w, h)
+                        resample=int(getattr(tfm, "mode", Image.BILINEAR)))
+            if name == "Resize":
+                meta.update(method=str(tfm.method), pad_mode=str(tfm.pad_mode))
+            else:
+                meta.update(val_xtra=float(tfm.val_xtra))
+        elif name not in _ITEM_NOOP and getattr(tfm, "split_idx", None) != 0:  # split_idx 0 = 학습 때만
+            raise _unsupported(tfm, "item")
+    if meta["size"] is None:
+        s = model_input_size(learner) or 224
+        meta["size"] = [s, s]
+    mean, std = [0.0, 0.0, 0.0], [1.0, 1.0, 1.0]
+    for tfm in getattr(learner.dls.after_batch, "fs", []):
+        name = type(tfm).__name__
+        if name == "Normalize" and getattr(tfm, "mean", None) is not None:
+            mean = [float(v) for v in tfm.mean.flatten()]
+            std = [float(v) for v in tfm.std.flatten()]
+        elif name in _BATCH_NOOP or getattr(tfm, "split_idx", None) == 0:
+            continue
+        elif hasattr(tfm, "aff_fs") and getattr(tfm, "size", None) is None:
+            continue  # aug_transforms의 affine/warp: 검증 시에는 항등 변환
+        else:
+            raise _unsupported(tfm, "batch")
+    sigmoid = "BCE" in type(learner.loss_func).__name__
+    return {"vocab": [str(x) for x in learner.dls.vocab], **meta,
+            "mean": mean, "std": std, "activation": "sigmoid" if sigmoid else "softmax"}
+
+
+def export(learner, model_path: str, out_dir: str, formats=("torchscript", "onnx"), quantize: bool = False):
+    os.makedirs(out_dir, exist_ok=True)
+    meta = preprocess_meta(learner)
+    meta["source_model"] = model_identity(model_path)
+    wrapped = _Exported(learner.model.eval().cpu(), meta["mean"], meta["std"],
+                        meta["activation"] == "sigmoid").eval()
+    w, h = meta["size"]
+    example = torch.zeros(1, 3, h, w)
+    written = []
+
+    if "torchscript" in formats:
+        with torch.no_grad():
+            ts = torch.jit.freeze(torch.jit.trace(wrapped, example))
+        path = os.path.join(out_dir, ENGINE_FILES["torchscript"])
+        ts.save(path)
+        written.append(path)
+        if quantize:
+            # 동적 양자화는 Linear 계층(분류 헤드)에만 적용된다
+            q = torch.ao.quantization.quantize_dynamic(wrapped, {nn.Linear}, dtype=torch.qint8)
+            with torch.no_grad():
+                qts = torch.jit.trace(q, example)
+            path = os.path.join(out_dir, ENGINE_FILES["torchscript-int8"])
+            qts.save(path)
+            written.append(path)
+
+    if "onnx" in formats:
+        path = os.path.join(out_dir, ENGINE_FILES["onnx"])
+        with torch.no_grad():
+            torch.onnx.export(wrapped, example, path, input_names=["image"], output_names=["probs"],
+                              dynamic_axes={"image": {0: "batch"}, "probs": {0: "batch"}}, opset_version=17)
+        written.append(path)
+        if quantize:
+            # ONNX Runtime 동적 양자화는 Conv를 ConvInteger로, MatMul을 MatMulInteger로 바꾼다.
+            # CPU의 ConvInteger 커널은 uint8 가중치만 지원하므로 QUInt8을 쓴다 (QInt8이면 세션 생성 시 NOT_IMPLEMENTED).
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            qpath = os.path.join(out_dir, ENGINE_FILES["onnx-int8"])
+            quantize_dynamic(path, qpath, weight_type=QuantType.QUInt8)
+            written.append(qpath)
+
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False, indent=2)
+    verify_exports(written, model_path, out_dir)
+    return written
+
+
+def verify_exports(paths: list[str], model_path: str, out_dir: str):
+    """내보낸 파일을 실제 엔진으로 열어 한 번 추론해 본다. 실행할 수 없는 파일은 지우고 RuntimeError
+    (앱 시작 때가 아니라 내보낼 때 실패하도록)."""
+    names = {os.path.join(out_dir, fn): name for name, fn in ENGINE_FILES.items()}
+    for path in paths:
+        name = names[path]
+        try:
+            warm_up(load_engine(name, "", model_path, out_dir))
+        except Exception as e:
+            os.remove(path)
+            raise RuntimeError(f"exported {name} engine ({path}) cannot run: {type(e).__name__}: {e}") from e
+
+
+# ======================
+# parity check
+# ======================
+def collect_samples(sample_dir: str, labels: list[str], limit: int = 0) -> list[tuple[str, str | None]]:
+    """샘플 이미지 경로와 정답 라벨(상위 폴더 이름이 vocab에 있을 때) 목록."""
+    out = []
+    for root, _, files in os.walk(sample_dir):
+        for fn in sorted(files):
+            if fn.lower().endswith(IMG_EXTS):
+                parent = os.path.basename(root)
+                out.append((os.path.join(root, fn), parent if parent in labels else None))
+    out.sort()
+    return out[:limit] if limit else out
+
+
+def _run_engine(engine, pils, batch_size: int):
+    t0 = time.perf_counter()
+    probs = np.concatenate([engine.predict_probs(pils[i:i + batch_size])
+                            for i in range(0, len(pils), batch_size)])
+    return probs, (time.perf_counter() - t0) * 1000.0 / max(len(pils), 1)
+
+
+def parity_report(ref, engine, samples, batch_size: int = 16) -> dict:
+    """ref(보통 fastai) 대비 engine의 top-1 일치율, 확률 drift, 정확도, 지연시간."""
+    pils = []
+    for path, _ in samples:
+        with open(path, "rb") as fh:
+            pils.append(decode_image(fh.read(), ref.input_size))
+    p_ref, ms_ref = _run_engine(ref, pils, batch_size)
+    p_eng, ms_eng = _run_engine(engine, pils, batch_size)
+    drift = np.abs(p_ref - p_eng)
+    top_ref, top_eng = p_ref.argmax(1), p_eng.argmax(1)
+    report = {
+        "engine": engine.name,
+        "n": len(samples),
+        "top1_agreement": float((top_ref == top_eng).mean()),
+        "mean_abs_drift": float(drift.mean()),
+        "max_abs_drift": float(drift.max()),
+        "ref_ms_per_image": ms_ref,
+        "ms_per_image": ms_eng,
+    }
+    truth = [(i, ref.labels.index(lbl)) for i, (_, lbl) in enumerate(samples) if lbl is not None]
+    if truth:
+        idx, y = np.array([i for i, _ in truth]), np.array([t for _, t in truth])
+        report["ref_accuracy"] = float((top_ref[idx] == y).mean())
+        report["accuracy"] = float((top_eng[idx] == y).mean())
+    return report
+
+
+# ======================
+# CLI
+# ======================
+def main(argv=None):
+    p = argparse.ArgumentParser(description="fastai 모델 내보내기 / 엔진 parity 검사")
+    p.add_argument("--file-id", default=DEFAULT_FILE_ID)
+    p.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    p.add_argument("--export-dir", default=DEFAULT_EXPORT_DIR)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    e = sub.add_parser("export", help="TorchScript/ONNX 파일 생성")
+    e.add_argument("--format", nargs="+", choices=["torchscript", "onnx"], default=["torchscript", "onnx"])
+    e.add_argument("--quantize", action="store_true", help="int8 동적 양자화 버전도 생성")
+
+    c = sub.add_parser("parity", help="fastai 엔진과 결과 비교")
+    c.add_argument("--samples", required=True, help="샘플 이미지 폴더 (하위 폴더 이름 = 정답 라벨)")
+    c.add_argument("--engine", nargs="+", choices=list(ENGINE_FILES), default=None,
+                   help="비교할 엔진 (기본: 내보낸 파일이 있는 전부)")
+    c.add_argument("--limit", type=int, default=0)
+    c.add_argument("--batch-size", type=int, default=16)
+
+    args = p.parse_args(argv)
+    if args.cmd == "export":
+        learner = load_model(args.file_id, args.model_path)
+        try:
+            written = export(learner, args.model_path, args.export_dir, args.format, args.quantize)
+        except (ValueError, RuntimeError) as err:  # 재현할 수 없는 전처리 transform / 실행할 수 없는 파일
+            print(err, file=sys.stderr)
+            return 1
+        for path in written:
+            print(f"wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+        return 0
+
+    ref = load_engine("fastai", args.file_id, args.model_path)
+    names = args.engine or [n for n, fn in ENGINE_FILES.items()
+                            if os.path.exists(os.path.join(args.export_dir, fn))]
+    samples = collect_samples(args.samples, ref.labels, args.limit)
+    if not samples:
+        print(f"no images found under {args.samples}", file=sys.stderr)
+        return 1
+    reports = [parity_report(ref, load_engine(n, args.file_id, args.model_path, args.export_dir),
+                             samples, args.batch_size) for n in names]
+    print(json.dumps(reports, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# imaging.py
+# 이미지 디코딩/썸네일 유틸 (Streamlit 없이도 import 가능)
+import base64
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from metrics import no_span
+
+DISPLAY_SIDE = 800  # 화면 표시용 사본의 긴 변 최대 길이
+
+
+def load_pil_from_bytes(b: bytes, span=no_span) -> Image.Image:
+    """원본 해상도 그대로 디코딩 (EXIF 회전 + RGB 변환)."""
+    with span("decode"):
+        pil, source_size = _open(b, None)
+    return _finish(pil, source_size, span)
+
+
+def model_input_size(learner) -> int | None:
+    """learner의 transform(Resize 등)에서 모델 입력 크기를 읽는다. 못 찾으면 None."""
+    sizes = []
+    for pipe in (getattr(learner.dls, "after_item", None), getattr(learner.dls, "after_batch", None)):
+        for tfm in getattr(pipe, "fs", []) or []:
+            size = getattr(tfm, "size", None)
+            if size is None:
+                continue
+            try:
+                sizes.extend([int(size)] if isinstance(size, int) else [int(x) for x in size])
+            except (TypeError, ValueError):
+                continue
+    return max(sizes) if sizes else None
+
+
+def _reducible(pil: Image.Image) -> Image.Image:
+    """Image.reduce가 다루지 못하는 모드(팔레트, 1비트, 16비트 정수)는 먼저 RGB로 바꾼다.
+
+    (PA는 reduce가 되기는 하지만 팔레트 번호를 평균내므로 역시 변환)
+    """
+    if pil.mode in ("1", "P", "PA") or pil.mode.startswith("I;16"):
+        return pil.convert("RGB")
+    return pil
+
+
+def _reduce_to(pil: Image.Image, min_side: int) -> Image.Image:
+    """짧은 변이 min_side 아래로 내려가지 않는 선에서 정수 배 축소 (box 필터, 빠름)."""
+    factor = min(pil.size) // min_side
+    return _reducible(pil).reduce(factor) if factor >= 2 else pil
+
+
+def _open(b: bytes, min_side: int | None) -> tuple[Image.Image, tuple[int, int]]:
+    """열고(JPEG이면 min_side 근처로 draft) 픽셀을 읽는다. (이미지, 원본 크기)."""
+    pil = Image.open(BytesIO(b))
+    source_size = pil.size
+    if min_side:
+        pil.draft("RGB", (min_side, min_side))
+    pil.load()
+    return pil, source_size
+
+
+def _finish(pil: Image.Image, source_size, span=no_span) -> Image.Image:
+    with span("exif_transpose"):
+        pil = ImageOps.exif_transpose(pil)
+    with span("convert_rgb"):
+        if pil.mode != "RGB": pil = pil.convert("RGB")
+    pil.info["source_size"] = source_size
+    return pil
+
+
+def decode_image(b: bytes, min_side: int | None = None, span=no_span) -> Image.Image:
+    """짧은 변이 min_side 이상인 선에서 최대한 작게 디코딩한다.
+
+    JPEG은 draft(DCT 스케일링)로 1/2~1/8 크기로 바로 디코딩하고, 그 외 포맷은 디코딩 후
+    정수 배로 축소한다. EXIF 회전은 축소된 이미지에 적용하므로 비용이 작다.
+    원본 크기는 pil.info["source_size"]에 남긴다. span은 단계별 계측용 (metrics.RequestTrace.span).
+    같은 바이트와 min_side면 어느 경로(단일/일괄/추론 서버)에서든 같은 이미지가 나온다.
+    """
+    if not min_side:
+        return load_pil_from_bytes(b, span)
+    with span("decode"):
+        pil, source_size = _open(b, min_side)
+        pil = _reduce_to(pil, min_side)
+    return _finish(pil, source_size, span)
+
+
+def decode_for_model(b: bytes, target: int | None, display_side: int = DISPLAY_SIDE, span=no_span):
+    """(모델 입력용 이미지, 화면 표시용 축소본)을 함께 반환.
+
+    모델 입력은 항상 decode_image(b, target)과 같다 (예측 캐시 키가 이미지 바이트뿐이므로 경로마다
+    입력이 달라지면 안 된다). 표시용은 가능하면 같은 디코딩 결과에서 만들고, JPEG draft 때문에
+    너무 작아졌을 때만 따로 디코딩한다.
+    """
+    if not target:
+        model_img = load_pil_from_bytes(b, span)
+        raw = None
+    else:
+        with span("decode"):
+            raw, source_size = _open(b, target)
+        model_img = _finish(_reduce_to(raw, target), source_size, span)
+    with span("display_thumbnail"):
+        side = display_side // 2
+        if raw is None:
+            display = model_img.copy()
+        elif min(raw.size) >= side or raw.size == source_size:
+            display = _finish(_reduce_to(raw, side), source_size)
+        else:  # draft로 작게 읽힌 JPEG → 표시용은 따로
+            display = decode_image(b, side)
+        display.thumbnail((display_side, display_side))
+    return model_img, display
+
+
+def thumbnail_data_uri(pil: Image.Image, size: int = 64, quality: int = 70) -> str:
+    """작은 JPEG 썸네일을 data URI로 반환 (표/HTML에 바로 넣기 위함)."""
+    th = pil.copy()
+    th.thumbnail((size, size))
+    buf = BytesIO()
+    th.save(buf, format="JPEG", quality=quality)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
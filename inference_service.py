@@ -0,0 +1,401 @@
+# inference_service.py
+# 헤드리스 추론 서버 + CLI
+# 여러 세션/클라이언트의 요청을 하나의 큐에 모아 마이크로배치로 추론한다.
+#
+#   python inference_service.py serve --port 8502 --max-batch 16 --max-wait-ms 10
+#   python inference_service.py predict a.jpg b.jpg                      # 프로세스 안에서 추론
+#   python inference_service.py predict a.jpg --url http://127.0.0.1:8502  # 서버에 요청
+#
+# Streamlit 앱은 st.secrets["INFERENCE_URL"]이 있으면 모델을 직접 돌리지 않고 이 서버를 호출한다.
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request as urlrequest
+from urllib.error import HTTPError, URLError
+
+import numpy as np
+
+import metrics
+from engines import DEFAULT_EXPORT_DIR, ENGINES, load_and_warm
+from imaging import decode_image
+from model_loader import DEFAULT_FILE_ID, DEFAULT_MODEL_PATH, STARTUP_PHASES
+from pred_cache import PredictionCache, cache_key
+
+MAX_BODY_BYTES = 25 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """큐가 가득 차서 요청을 받을 수 없음 (HTTP 503)."""
+
+
+class BadImage(ValueError):
+    """업로드된 바이트를 이미지로 디코딩할 수 없음 (HTTP 400)."""
+
+
+# ======================
+# 마이크로배처
+# ======================
+class MicroBatcher:
+    """submit()으로 들어온 항목을 최대 max_batch개 / 최대 max_wait_ms 동안 모아 batch_fn 한 번으로 처리.
+
+    큐가 max_queue개를 넘으면 submit()이 즉시 Overloaded를 던진다 (backpressure).
+    """
+
+    def __init__(self, batch_fn, max_batch: int = 16, max_wait_ms: float = 10.0, max_queue: int = 256):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue = max(1, int(max_queue))
+        self._q: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._stop = threading.Event()
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        if self._stop.is_set():
+            raise Overloaded("batcher is shut down")
+        fut: Future = Future()
+        try:
+            self._q.put_nowait((item, fut))
+        except queue.Full:
+            self.rejected += 1
+            raise Overloaded(f"queue full ({self.max_queue})") from None
+        return fut
+
+    def _collect(self):
+        try:
+            batch = [self._q.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait())
+            except queue.Empty:
+                break
+        return [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                if len(results) != len(batch):  # 남는 future가 timeout까지 걸려 있지 않도록
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} inputs")
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            metrics.observe_stage("batch_forward", time.perf_counter() - t0)
+            for (_, fut), r in zip(batch, results):
+                fut.set_result(r)
+            self.batches += 1
+            self.items += len(batch)
+        # 종료 시 남은 요청은 거절
+        while True:
+            try:
+                _, fut = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if fut.set_running_or_notify_cancel():
+                fut.set_exception(Overloaded("batcher is shut down"))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._q.qsize(),
+            "max_queue": self.max_queue,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": (self.items / self.batches) if self.batches else 0.0,
+            "rejected": self.rejected,
+        }
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+# ======================
+# 추론 서비스
+# ======================
+class InferenceService:
+    """엔진(engines.py) 하나를 감싸 캐시 확인 → 디코딩 → 마이크로배치 추론을 수행."""
+
+    def __init__(self, engine, max_batch: int = 16, max_wait_ms: float = 10.0,
+                 max_queue: int = 256, cache_items: int = 256):
+        self.engine = engine
+        self.model_id = engine.model_id
+        self.labels = engine.labels
+        self.input_size = engine.input_size
+        self.cache = PredictionCache(max_items=cache_items)
+        self.batcher = MicroBatcher(engine.predict_probs, max_batch=max_batch,
+                                    max_wait_ms=max_wait_ms, max_queue=max_queue)
+
+    def info(self) -> dict:
+        return {"labels": self.labels, "input_size": self.input_size, "model_id": self.model_id,
+                "engine": self.engine.name}
+
+    def stats(self) -> dict:
+        return {"batcher": self.batcher.stats(), "cache": self.cache.stats(), "startup": STARTUP_PHASES}
+
+    def predict(self, img_bytes: bytes, timeout: float = 30.0):
+        trace = metrics.start_request("service")
+        trace.set(image_bytes=len(img_bytes))
+        try:
+            return self._predict(img_bytes, timeout, trace)
+        except Exception as e:  # BadImage, Overloaded, 타임아웃, 모델 오류도 요청 로그에 남긴다
+            trace.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            trace.finish()
+
+    def _predict(self, img_bytes: bytes, timeout: float, trace):
+        with trace.span("cache_lookup"):
+            key = cache_key(img_bytes, self.model_id)
+            hit = self.cache.get(key)
+        if hit is not None:
+            trace.set(cache_hit=True, label=hit[0])
+            return hit
+        try:
+            pil = decode_image(img_bytes, self.input_size, trace.span)
+        except Exception as e:  # UnidentifiedImageError, DecompressionBombError, 잘린 파일 등
+            raise BadImage(f"{type(e).__name__}: {e}") from e
+        trace.set(cache_hit=False, image_px=pil.info["source_size"][0] * pil.info["source_size"][1])
+        with trace.span("queue_and_batch"):
+            probs = self.batcher.submit(pil).result(timeout)
+        idx = int(np.argmax(probs))
+        trace.set(label=self.labels[idx])
+        return self.cache.put(key, self.labels[idx], idx, probs)
+
+    def close(self):
+        self.batcher.close()
+
+
+def make_handler(service: InferenceService, timeout: float = 30.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, code: int, obj, headers: dict | None = None):
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send_json(200, {"ok": True})
+            elif self.path == "/info":
+                self._send_json(200, service.info())
+            elif self.path == "/stats":
+                self._send_json(200, service.stats())
+            elif self.path == "/metrics":
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                n = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                self.close_connection = True
+                self._send_json(400, {"error": "invalid Content-Length"})
+                return
+            if n <= 0 or n > MAX_BODY_BYTES:
+                self.close_connection = True
+                self._send_json(413 if n else 400, {"error": "body must be 1..%d bytes" % MAX_BODY_BYTES})
+                return
+            body = self.rfile.read(n)
+            try:
+                pred, pred_idx, probs = service.predict(body, timeout)
+            except Overloaded as e:
+                self._send_json(503, {"error": str(e)}, {"Retry-After": "1"})
+            except FutureTimeout:
+                self._send_json(504, {"error": "inference timed out"})
+            except BadImage as e:
+                self._send_json(400, {"error": f"cannot decode image: {e}"})
+            except Exception as e:  # 모델 오류 등: 연결을 그냥 끊지 말고 500으로 응답
+                logger.exception("predict failed")
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            else:
+                self._send_json(200, {"label": pred, "index": pred_idx,
+                                      "probs": [float(p) for p in probs]})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+# ======================
+# 클라이언트 (Streamlit 앱/CLI에서 사용)
+# ======================
+REMOTE_ERRORS = (Overloaded, URLError, TimeoutError)  # 클라이언트가 던지는 예외 (HTTPError는 URLError 하위)
+
+
+def error_message(e: Exception) -> str:
+    """클라이언트 예외를 화면/표에 보여줄 한 줄로. HTTP 오류는 서버 JSON의 error 필드를 쓴다."""
+    if isinstance(e, HTTPError):
+        try:
+            msg = json.loads(e.read())["error"]
+        except (ValueError, KeyError, TypeError, OSError):
+            msg = e.reason
+        return f"HTTP {e.code}: {msg}"
+    if isinstance(e, URLError):
+        return f"connection failed: {e.reason}"
+    return f"{type(e).__name__}: {e}"
+
+
+class InferenceClient:
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        info = self._request("/info")
+        self.labels = info["labels"]
+        self.input_size = info["input_size"]
+        self.model_id = info["model_id"]
+
+    def _request(self, path: str, data: bytes | None = None):
+        req = urlrequest.Request(self.url + path, data=data,
+                                 headers={"Content-Type": "application/octet-stream"} if data else {})
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read())
+        except HTTPError as e:
+            if e.code == 503:
+                try:
+                    msg = json.loads(e.read())["error"]
+                except (ValueError, KeyError, TypeError):
+                    msg = "server overloaded"
+                raise Overloaded(msg) from None
+            raise
+
+    def predict(self, img_bytes: bytes):
+        r = self._request("/predict", img_bytes)
+        return r["label"], int(r["index"]), np.asarray(r["probs"], dtype=np.float32)
+
+    def predict_probs(self, images: list[bytes], workers: int = 8, return_exceptions: bool = False):
+        """여러 장을 동시에 보내 서버 쪽에서 마이크로배치되도록 한다.
+
+        return_exceptions=True이면 실패한 이미지(과부하 503, 디코딩 400 등) 자리에 예외를 넣은 리스트를 반환한다.
+        """
+        def one(b):
+            try:
+                return self.predict(b)[2]
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(one, images))
+        return results if return_exceptions else np.stack(results)
+
+
+# ======================
+# CLI
+# ======================
+def _load_service(args) -> InferenceService:
+    engine = load_and_warm(args.engine, args.file_id, args.model_path, args.export_dir, args.sha256)
+    return InferenceService(engine, max_batch=args.max_batch,
+                            max_wait_ms=args.max_wait_ms, max_queue=args.queue_size)
+
+
+def cmd_serve(args):
+    if args.metrics:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        metrics.configure(True)
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    service = _load_service(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service, args.timeout))
+    print(f"serving on http://{args.host}:{args.port} "
+          f"(max_batch={args.max_batch}, max_wait_ms={args.max_wait_ms}, queue={args.queue_size})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def cmd_predict(args):
+    if args.url:
+        client = InferenceClient(args.url, args.timeout)
+        predict = client.predict
+    else:
+        service = _load_service(args)
+        predict = service.predict
+    with ThreadPoolExecutor(max_workers=args.max_batch) as ex:
+        def run(path):
+            with open(path, "rb") as fh:
+                return path, predict(fh.read())
+        for path, (pred, idx, probs) in ex.map(run, args.images):
+            print(json.dumps({"file": path, "label": pred, "index": idx, "prob": float(probs[idx])},
+                             ensure_ascii=False))
+    if not args.url:
+        service.close()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Fastai 이미지 분류 추론 서버/CLI")
+    p.add_argument("--file-id", default=DEFAULT_FILE_ID)
+    p.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    p.add_argument("--sha256", default=None, help="모델 파일의 기대 SHA-256 (다르면 다시 받음)")
+    p.add_argument("--engine", choices=ENGINES, default="fastai")
+    p.add_argument("--export-dir", default=DEFAULT_EXPORT_DIR)
+    p.add_argument("--max-batch", type=int, default=16)
+    p.add_argument("--max-wait-ms", type=float, default=10.0)
+    p.add_argument("--queue-size", type=int, default=256)
+    p.add_argument("--timeout", type=float, default=30.0)
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("serve", help="localhost HTTP 서버 실행")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8502)
+    s.add_argument("--threads", type=int, default=0, help="torch CPU 스레드 수 (0이면 기본값)")
+    s.add_argument("--metrics", action="store_true", help="단계별 계측 켜기 (/metrics, 요청별 JSON 로그)")
+    s.set_defaults(func=cmd_serve)
+
+    q = sub.add_parser("predict", help="이미지 파일 분류 (JSON lines 출력)")
+    q.add_argument("images", nargs="+")
+    q.add_argument("--url", default="", help="지정하면 서버에 요청, 없으면 프로세스 안에서 추론")
+    q.set_defaults(func=cmd_predict)
+
+    args = p.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
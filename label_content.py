@@ -0,0 +1,283 @@
+# label_content.py
+# 라벨별 고정 콘텐츠: 외부 매니페스트(JSON) + 로컬 미디어 캐시
+#
+# 매니페스트 예 (content/labels.json):
+#   {"labels": [
+#       {"label": "jordan", "texts": [...], "images": [...], "videos": [...]},
+#       {"index": 2, ...}            # 라벨 이름 대신 dls.vocab 순서로 지정해도 됨
+#   ]}
+# texts는 일반 텍스트로 표시된다 (HTML 태그는 이스케이프됨).
+# images 항목은 http(s) URL, data: URI, 또는 매니페스트 기준 상대 경로 파일.
+# 이미지와 유튜브 썸네일은 한 번만 받아서 작은 JPEG으로 줄여 디스크 캐시에 저장하고,
+# Streamlit 정적 파일(app/static/...)로 내보낸다. 매니페스트 파일이 바뀌면 자동으로 다시 읽는다.
+# 매니페스트의 미디어는 백그라운드에서 미리 받아 두고(MediaCache.prefetch), 받기에 실패한 것은
+# retry_after초 동안 원본 URL을 쓰다가 다시 시도한다.
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib import request as urlrequest
+
+from imaging import decode_image
+
+DEFAULT_MANIFEST = "content/labels.json"
+DEFAULT_CACHE_DIR = "static/media_cache"
+MAX_ITEMS = 3  # 라벨당 종류별 최대 표시 개수
+
+
+# ======================
+# 유튜브
+# ======================
+def yt_id_from_url(url: str) -> str | None:
+    if not url: return None
+    pats = [r"(?:v=|/)([0-9A-Za-z_-]{11})(?:\?|&|/|$)", r"youtu\.be/([0-9A-Za-z_-]{11})"]
+    for p in pats:
+        m = re.search(p, url)
+        if m: return m.group(1)
+    return None
+
+
+def yt_thumb(url: str) -> str | None:
+    vid = yt_id_from_url(url)
+    return f"https://img.youtube.com/vi/{vid}/hqdefault.jpg" if vid else None
+
+
+def pick_top3(lst):
+    return [x for x in lst if isinstance(x, str) and x.strip()][:MAX_ITEMS]
+
+
+# ======================
+# 매니페스트
+# ======================
+class ContentManifest:
+    """매니페스트 파일을 읽어 라벨 → {texts, images, videos}로 해석. 파일 mtime이 바뀌면 다시 읽는다."""
+
+    def __init__(self, path: str = DEFAULT_MANIFEST):
+        self.path = path
+        self.base_dir = os.path.dirname(os.path.abspath(path))
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._entries: list[dict] = []
+        self._resolved: dict = {}  # tuple(labels) → {label: cfg}
+        self.error: str | None = None
+
+    def _maybe_reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            entries, error = [], None
+            if mtime is not None:
+                try:
+                    with open(self.path, encoding="utf-8") as fh:
+                        entries = json.load(fh).get("labels", [])
+                    if not isinstance(entries, list):
+                        raise ValueError('"labels" must be a list')
+                except (OSError, ValueError, AttributeError) as e:
+                    entries, error = [], f"{self.path}: {e}"
+            self._entries, self.error = entries, error
+            self._resolved = {}
+            self._mtime = mtime
+
+    def _resolve(self, labels: list[str]) -> tuple[dict, list[str]]:
+        out, problems = {}, []
+        for i, entry in enumerate(self._entries):
+            if not isinstance(entry, dict):
+                problems.append(f"항목 {i}: 객체가 아닙니다")
+                continue
+            if "label" in entry:
+                name = str(entry["label"])
+                if name not in labels:
+                    problems.append(f"항목 {i}: 모델에 없는 라벨 `{name}`")
+                    continue
+            elif isinstance(entry.get("index"), int) and 0 <= entry["index"] < len(labels):
+                name = labels[entry["index"]]
+            else:
+                problems.append(f"항목 {i}: `label` 또는 올바른 `index`가 필요합니다")
+                continue
+            if name in out:
+                problems.append(f"항목 {i}: 라벨 `{name}`이(가) 중복됩니다")
+            out[name] = {k: pick_top3(entry.get(k) or []) for k in ("texts", "images", "videos")}
+        missing = [lbl for lbl in labels if lbl not in out]
+        if missing:
+            problems.append(f"콘텐츠가 없는 라벨: {', '.join(missing)}")
+        return out, problems
+
+    def resolved(self, labels: list[str]) -> tuple[dict, list[str]]:
+        """(라벨 → 콘텐츠, 검증 경고 목록). 같은 매니페스트/vocab이면 캐시된 결과를 돌려준다."""
+        self._maybe_reload()
+        key = tuple(labels)
+        cached = self._resolved.get(key)
+        if cached is None:
+            cached = self._resolve(list(labels))
+            if self.error:
+                cached[1].insert(0, self.error)
+            self._resolved[key] = cached
+        return cached
+
+    def validate(self, labels: list[str]) -> list[str]:
+        return self.resolved(labels)[1]
+
+    def get(self, label: str, labels: list[str]):
+        """라벨명으로 콘텐츠 반환 (texts, images, videos). 없으면 빈 리스트."""
+        cfg = self.resolved(labels)[0].get(label, {})
+        return cfg.get("texts", []), cfg.get("images", []), cfg.get("videos", [])
+
+    def media_sources(self, labels: list[str]) -> list[str]:
+        """모든 라벨의 이미지 + 동영상 썸네일 주소 (MediaCache.prefetch용)."""
+        out = []
+        for cfg in self.resolved(labels)[0].values():
+            out.extend(cfg["images"])
+            out.extend(t for t in map(yt_thumb, cfg["videos"]) if t)
+        return out
+
+
+# ======================
+# 미디어 캐시
+# ======================
+def _http_fetch(url: str, timeout: float = 10.0) -> bytes:
+    req = urlrequest.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with urlrequest.urlopen(req, timeout=timeout) as resp:
+        return resp.read()
+
+
+class MediaCache:
+    """원격/인라인 이미지를 한 번만 받아 width 크기 JPEG 썸네일로 디스크에 저장 (총 max_bytes 제한, 오래된 것부터 삭제).
+
+    fetch(url) → bytes 는 바꿔 끼울 수 있다 (오프라인 환경에서는 로컬 대체 함수 사용).
+    받기에 실패한 주소는 retry_after초 동안 원본 URL로 대체하고 그 뒤에 다시 시도한다.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 50 * 1024 * 1024,
+                 width: int = 480, base_dir: str = ".", fetch=_http_fetch,
+                 url_prefix: str | None = "app/static/media_cache", retry_after: float = 300.0,
+                 workers: int = 4):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.width = width
+        self.base_dir = base_dir
+        self.fetch = fetch
+        self.url_prefix = url_prefix  # None이면 data URI로 인라인
+        self.retry_after = retry_after
+        self._urls: dict[str, str] = {}
+        self._failed: dict[str, float] = {}  # src → 다시 시도할 시각 (time.monotonic)
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="media-prefetch")
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _read_source(self, src: str) -> bytes:
+        if src.startswith("data:"):
+            return base64.b64decode(src.split(",", 1)[1])
+        if src.startswith(("http://", "https://")):
+            return self.fetch(src)
+        with open(os.path.join(self.base_dir, src), "rb") as fh:
+            return fh.read()
+
+    def _evict(self):
+        files = []
+        for fn in os.listdir(self.cache_dir):
+            p = os.path.join(self.cache_dir, fn)
+            if fn.endswith(".jpg") and os.path.isfile(p):
+                st_ = os.stat(p)
+                files.append((st_.st_mtime, st_.st_size, p))
+        total = sum(size for _, size, _ in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(p)
+            total -= size
+
+    def thumbnail_path(self, src: str) -> str | None:
+        """src의 썸네일 파일 경로. 처음이면 받아서 줄여 저장하고, 실패하면 None."""
+        key = hashlib.sha1(f"{self.width}:{src}".encode("utf-8")).hexdigest()
+        path = os.path.join(self.cache_dir, key + ".jpg")
+        if os.path.exists(path):
+            os.utime(path)  # LRU 갱신
+            return path
+        try:
+            pil = decode_image(self._read_source(src), self.width)
+        except Exception:  # 네트워크/디코딩 오류 → 원본 URL로 대체
+            return None
+        pil.thumbnail((self.width, self.width))
+        fd, tmp = tempfile.mkstemp(suffix=".part", dir=self.cache_dir)
+        with os.fdopen(fd, "wb") as fh:
+            pil.save(fh, format="JPEG", quality=82, optimize=True)
+        os.replace(tmp, path)
+        with self._lock:
+            self._evict()
+        return path
+
+    @staticmethod
+    def _fallback(src: str) -> str | None:
+        return None if src.startswith("data:") else src
+
+    def _cached_url(self, src: str) -> str | None:
+        cached = self._urls.get(src)
+        if cached and self.url_prefix and not os.path.exists(
+                os.path.join(self.cache_dir, os.path.basename(cached))):
+            return None  # 캐시 파일이 밀려남 → 다시 만든다
+        return cached
+
+    def _resolve(self, src: str) -> str | None:
+        path = self.thumbnail_path(src)
+        if path is None:  # 실패는 retry_after초 동안 기억해 매 렌더링마다 다시 받지 않는다
+            self._failed[src] = time.monotonic() + self.retry_after
+            return self._fallback(src)
+        self._failed.pop(src, None)
+        if self.url_prefix is not None:
+            out = f"{self.url_prefix}/{os.path.basename(path)}"
+        else:
+            with open(path, "rb") as fh:
+                out = "data:image/jpeg;base64," + base64.b64encode(fh.read()).decode("ascii")
+        self._urls[src] = out
+        return out
+
+    def _retry_later(self, src: str) -> bool:
+        return time.monotonic() < self._failed.get(src, 0.0)
+
+    def prefetch(self, srcs) -> list[Future]:
+        """srcs를 백그라운드 스레드에서 미리 받아 둔다. 이미 캐시됐거나 받는 중이거나 재시도 대기 중이면 건너뜀."""
+        futs = []
+        with self._lock:
+            for src in dict.fromkeys(s for s in srcs if s):
+                if src in self._pending or self._cached_url(src) or self._retry_later(src):
+                    continue
+                fut = self._pool.submit(self._resolve, src)
+                self._pending[src] = fut
+                fut.add_done_callback(lambda _, src=src: self._pending.pop(src, None))
+                futs.append(fut)
+        return futs
+
+    def url(self, src: str | None, block: bool = True) -> str | None:
+        """HTML에 넣을 이미지 주소: 캐시된 썸네일(정적 파일 또는 data URI). 캐시 실패 시 원본 URL로 대체.
+
+        block=False이면 원격 이미지를 여기서 받지 않는다: 아직 캐시에 없으면 백그라운드로 받게 하고
+        이번에는 원본 URL을 돌려준다 (화면 갱신이 네트워크를 기다리지 않도록).
+        """
+        if not src:
+            return None
+        cached = self._cached_url(src)
+        if cached:
+            return cached
+        if self._retry_later(src):
+            return self._fallback(src)
+        pending = self._pending.get(src)
+        remote = src.startswith(("http://", "https://"))
+        if not block and remote:
+            if pending is None:
+                self.prefetch([src])
+            return self._fallback(src)
+        if pending is not None:
+            return pending.result()
+        return self._resolve(src)
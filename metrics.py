@@ -0,0 +1,236 @@
+# metrics.py
+# 단계별 지연시간 계측 + Prometheus 텍스트 내보내기
+#
+#   trace = start_request("app")
+#   with trace.span("decode"): ...
+#   trace.set(label="...", image_bytes=123)
+#   record = trace.finish()        # 히스토그램 반영 + 요청별 JSON 로그 한 줄, 단계별 ms dict 반환
+#                                  # 실패한 요청도 trace.set(error=...) 후 finish() (finally에서)
+#
+# configure(False)(기본값)이면 start_request()는 NULL_TRACE를 돌려주고, span()은 미리 만들어 둔
+# nullcontext 하나를 재사용하므로 거의 비용이 없다.
+import json
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("ai3.request")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOAD_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+PIXEL_BUCKETS = (1e5, 3e5, 1e6, 2e6, 5e6, 8e6, 12e6, 24e6, 50e6)
+BYTE_BUCKETS = (5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7)
+
+_enabled = False
+_NULL = nullcontext()
+
+
+def configure(enabled: bool):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def no_span(name: str):
+    """계측하지 않을 때 span 자리에 넘기는 함수."""
+    return _NULL
+
+
+# ======================
+# 히스토그램 / 카운터
+# ======================
+def _escape(value) -> str:
+    """Prometheus 텍스트 형식의 라벨 값 이스케이프 (\\, ", 줄바꿈)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(label_name, value, extra: str = "") -> str:
+    parts = [f'{label_name}="{_escape(value)}"'] if label_name and value is not None else []
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help_: str, buckets, label_name: str | None = None):
+        self.name, self.help, self.buckets, self.label_name = name, help_, tuple(buckets), label_name
+        self._series: dict = {}  # 라벨 값 → [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label=None):
+        with self._lock:
+            s = self._series.get(label)
+            if s is None:
+                s = self._series[label] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for label, s in sorted(series.items(), key=lambda kv: str(kv[0])):
+            for b, c in zip(self.buckets, s):
+                le = 'le="%g"' % b
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.label_name, label, le)} {c}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.label_name, label, inf)} {s[-1]}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.label_name, label)} {s[-2]:.6f}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.label_name, label)} {s[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_: str, label_name: str | None = None):
+        self.name, self.help, self.label_name = name, help_, label_name
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label=None, n: int = 1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + n
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for label, v in sorted(values.items(), key=lambda kv: str(kv[0])):
+            lines.append(f"{self.name}{_fmt_labels(self.label_name, label)} {v}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("ai3_stage_seconds", "Per-stage latency of a prediction request.", LATENCY_BUCKETS, "stage")
+REQUEST_SECONDS = Histogram("ai3_request_seconds", "End-to-end latency of a prediction request.", LATENCY_BUCKETS, "source")
+MODEL_LOAD_SECONDS = Histogram("ai3_model_load_seconds", "Model startup phase duration.", LOAD_BUCKETS, "phase")
+IMAGE_PIXELS = Histogram("ai3_image_pixels", "Source image size in pixels.", PIXEL_BUCKETS)
+IMAGE_BYTES = Histogram("ai3_image_bytes", "Uploaded image size in bytes.", BYTE_BUCKETS)
+PREDICTIONS = Counter("ai3_predictions_total", "Predictions per label.", "label")
+CACHE_RESULTS = Counter("ai3_prediction_cache_total", "Prediction cache lookups.", "result")
+REQUEST_ERRORS = Counter("ai3_request_errors_total", "Prediction requests that failed.", "source")
+REGISTRY = [STAGE_SECONDS, REQUEST_SECONDS, MODEL_LOAD_SECONDS, IMAGE_PIXELS, IMAGE_BYTES, PREDICTIONS, CACHE_RESULTS,
+            REQUEST_ERRORS]
+
+
+def observe_stage(stage: str, seconds: float):
+    if _enabled:
+        STAGE_SECONDS.observe(seconds, stage)
+
+
+def observe_startup(phase: str, seconds: float):
+    if _enabled:
+        MODEL_LOAD_SECONDS.observe(seconds, phase)
+
+
+def render_prometheus() -> str:
+    lines = []
+    for m in REGISTRY:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# ======================
+# 요청 단위 추적
+# ======================
+class _Span:
+    __slots__ = ("trace", "name", "t0")
+
+    def __init__(self, trace, name):
+        self.trace, self.name = trace, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stages = self.trace.stages
+        stages[self.name] = stages.get(self.name, 0.0) + time.perf_counter() - self.t0
+        return False
+
+
+class RequestTrace:
+    def __init__(self, source: str):
+        self.source = source
+        self.t0 = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.fields: dict = {}
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def finish(self) -> dict:
+        total = time.perf_counter() - self.t0
+        for stage, sec in self.stages.items():
+            STAGE_SECONDS.observe(sec, stage)
+        REQUEST_SECONDS.observe(total, self.source)
+        f = self.fields
+        if f.get("image_px"):
+            IMAGE_PIXELS.observe(f["image_px"])
+        if f.get("image_bytes"):
+            IMAGE_BYTES.observe(f["image_bytes"])
+        if f.get("label") is not None:
+            PREDICTIONS.inc(str(f["label"]))
+        if "cache_hit" in f:
+            CACHE_RESULTS.inc("hit" if f["cache_hit"] else "miss")
+        if f.get("error"):
+            REQUEST_ERRORS.inc(self.source)
+        record = {"source": self.source, "total_ms": round(total * 1000, 3),
+                  "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()}, **f}
+        logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        return record
+
+
+class _NullTrace:
+    stages: dict = {}
+    fields: dict = {}
+
+    def span(self, name):
+        return _NULL
+
+    def set(self, **fields):
+        pass
+
+    def finish(self):
+        return None
+
+
+NULL_TRACE = _NullTrace()
+
+
+def start_request(source: str = "app"):
+    return RequestTrace(source) if _enabled else NULL_TRACE
+
+
+# ======================
+# /metrics HTTP 서버 (Streamlit 앱용; 추론 서버는 자체 /metrics 사용)
+# ======================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
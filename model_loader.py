@@ -0,0 +1,151 @@
+# model_loader.py
+# Streamlit 앱과 추론 서버가 같이 쓰는 모델 로드 (Streamlit 의존성 없음)
+# - 모델 파일은 임시 파일로 받은 뒤 체크섬 확인 후 os.replace로 원자적으로 교체한다.
+#   (중간에 끊긴 다운로드 파일은 절대 재사용하지 않음)
+# - 옆에 <모델>.sha256 파일(JSON: sha256/size/mtime_ns)을 두어 다음 시작 때 빠르게 검증한다.
+#   기록도 기대 해시(MODEL_SHA256)도 없는 기존 파일은 언피클이 되는지 확인한 뒤에야 믿는다.
+# - 프로세스가 여러 개여도 파일 잠금으로 다운로드는 한 번만 일어난다.
+# - 각 시작 단계(다운로드, fastai import, 언피클, 워밍업)의 소요 시간을 STARTUP_PHASES에 기록한다.
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_FILE_ID = "1XvoIDnmo5CH7adgFcNL6JZTLT-hflLNO"
+DEFAULT_MODEL_PATH = "model.pkl"
+
+logger = logging.getLogger(__name__)
+STARTUP_PHASES: dict[str, float] = {}  # 단계 이름 → 초
+
+
+@contextmanager
+def timed(phase: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_PHASES[phase] = time.perf_counter() - t0
+        metrics.observe_startup(phase, STARTUP_PHASES[phase])
+        logger.info("startup phase %s: %.3fs", phase, STARTUP_PHASES[phase])
+
+
+def file_sha256(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(chunk):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _sidecar(path: str) -> str:
+    return path + ".sha256"
+
+
+def _write_sidecar(path: str, digest: str):
+    st_ = os.stat(path)
+    with open(_sidecar(path), "w", encoding="utf-8") as fh:
+        json.dump({"sha256": digest, "size": st_.st_size, "mtime_ns": st_.st_mtime_ns}, fh)
+
+
+def _cached_ok(path: str, expected: str | None) -> bool | None:
+    """캐시된 모델 파일이 완전한지 확인. 크기/mtime이 기록과 같으면 해시 재계산은 생략.
+
+    True: 확인됨 / False: 없거나 체크섬 불일치 / None: 파일은 있지만 기록(사이드카)도 기대 해시도 없어
+    완전한지 알 수 없음 (예전 방식으로 받다가 끊긴 파일일 수 있음).
+    """
+    if not os.path.exists(path):
+        return False
+    st_ = os.stat(path)
+    try:
+        with open(_sidecar(path), encoding="utf-8") as fh:
+            rec = json.load(fh)
+    except (OSError, ValueError):
+        rec = None
+    if rec and rec.get("size") == st_.st_size and rec.get("mtime_ns") == st_.st_mtime_ns:
+        return expected is None or rec.get("sha256") == expected.lower()
+    if expected is None:
+        return None
+    digest = file_sha256(path)
+    if digest != expected.lower():
+        return False
+    _write_sidecar(path, digest)
+    return True
+
+
+@contextmanager
+def _file_lock(path: str):
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def ensure_model_file(file_id: str, output_path: str, sha256: str | None = None, check=None) -> str:
+    """모델 파일이 없거나 체크섬이 맞지 않으면 Google Drive에서 내려받는다.
+
+    기록도 기대 해시도 없는 기존 파일은 check(path)가 예외 없이 끝날 때만 믿고(사이드카 기록),
+    check가 없거나 실패하면 다시 받는다.
+    """
+    state = _cached_ok(output_path, sha256)
+    if state is None and check is not None:
+        try:
+            check(output_path)
+        except ImportError:  # 파일이 아니라 환경 문제 (fastai 미설치 등)
+            raise
+        except Exception as e:  # 잘린 파일 등 → 다시 받음
+            logger.warning("unverified model file %s failed to load (%s); downloading again", output_path, e)
+        else:
+            _write_sidecar(output_path, file_sha256(output_path))
+            state = True
+    if state:
+        return output_path
+    with _file_lock(output_path):
+        if _cached_ok(output_path, sha256):  # 다른 프로세스가 먼저 받았음
+            return output_path
+        with timed("download"):
+            import gdown
+            fd, tmp = tempfile.mkstemp(prefix=os.path.basename(output_path) + ".",
+                                       suffix=".part", dir=os.path.dirname(os.path.abspath(output_path)))
+            os.close(fd)
+            try:
+                url = f"https://drive.google.com/uc?id={file_id}"
+                if not gdown.download(url, tmp, quiet=False):
+                    raise RuntimeError(f"model download failed: {url}")
+                digest = file_sha256(tmp)
+                if sha256 and digest != sha256.lower():
+                    raise RuntimeError(f"model checksum mismatch: expected {sha256}, got {digest}")
+                os.replace(tmp, output_path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            _write_sidecar(output_path, digest)
+    return output_path
+
+
+def _load_learner(path: str):
+    with timed("import_fastai"):
+        from fastai.learner import load_learner
+        import fastai.vision.all  # noqa: F401  (언피클에 필요한 vision 타입 등록)
+    with timed("load_learner"):
+        return load_learner(path, cpu=True)
+
+
+def load_model(file_id: str, output_path: str, sha256: str | None = None):
+    loaded = []  # 확인 안 된 기존 파일은 언피클로 확인하고, 성공하면 그 learner를 그대로 쓴다
+    ensure_model_file(file_id, output_path, sha256, check=lambda p: loaded.append(_load_learner(p)))
+    return loaded[0] if loaded else _load_learner(output_path)
@@ -0,0 +1,101 @@
+# pred_cache.py
+# 예측 결과 캐시: (이미지 바이트 해시 + 모델 파일 식별자) → (pred, pred_idx, probs)
+# 같은 사진을 다시 보거나 재업로드해도 learner.predict를 다시 돌리지 않도록 한다.
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def model_identity(path: str) -> str:
+    """모델 파일 식별자 (절대경로 + 크기 + 수정시각). 파일이 바뀌면 캐시 키도 바뀐다."""
+    st_ = os.stat(path)
+    return f"{os.path.abspath(path)}:{st_.st_size}:{st_.st_mtime_ns}"
+
+
+def cache_key(img_bytes: bytes, model_id: str) -> str:
+    h = hashlib.sha256()
+    h.update(model_id.encode("utf-8"))
+    h.update(b"\0")
+    h.update(img_bytes)
+    return h.hexdigest()
+
+
+def _entry_nbytes(value) -> int:
+    pred, _, probs = value
+    return sys.getsizeof(pred) + getattr(probs, "nbytes", 0) + 128
+
+
+class PredictionCache:
+    """프로세스 전역 LRU 캐시. 항목 수(max_items)와 대략적인 바이트 수(max_bytes)로 제한."""
+
+    def __init__(self, max_items: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_items = max(0, int(max_items))
+        self.max_bytes = max(0, int(max_bytes))
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, pred, pred_idx, probs):
+        value = (str(pred), int(pred_idx), np.asarray(probs, dtype=np.float32).copy())
+        size = _entry_nbytes(value)
+        if self.max_items == 0 or size > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= _entry_nbytes(old)
+            self._data[key] = value
+            self._bytes += size
+            while len(self._data) > self.max_items or self._bytes > self.max_bytes:
+                _, ev = self._data.popitem(last=False)
+                self._bytes -= _entry_nbytes(ev)
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key: str, compute):
+        """캐시에 있으면 그대로 반환, 없으면 compute()로 (pred, pred_idx, probs)를 구해 저장."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        pred, pred_idx, probs = compute()
+        return self.put(key, pred, pred_idx, probs)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "items": len(self._data),
+                "bytes": self._bytes,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
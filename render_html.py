@@ -0,0 +1,60 @@
+# render_html.py
+# 확률 막대 / 라벨 콘텐츠 HTML 생성 (Streamlit 없이 쓸 수 있어 벤치마크에서도 사용)
+# 항목마다 st.markdown을 부르지 않고, 패널 하나를 문자열 하나로 만들어 한 번에 그린다.
+from html import escape
+
+import numpy as np
+
+
+def sorted_probs(labels: list[str], probs) -> list[tuple[str, float]]:
+    p = np.asarray(probs, dtype=np.float64)
+    return [(labels[i], float(p[i])) for i in np.argsort(-p, kind="stable")]
+
+
+def prob_card_html(lbl: str, p: float, highlight: bool = False) -> str:
+    pct = p * 100
+    hi = "highlight" if highlight else ""
+    return (
+        '<div class="prob-card">'
+        '<div style="display:flex;justify-content:space-between;margin-bottom:6px;">'
+        f'<strong>{escape(lbl)}</strong><span>{pct:.2f}%</span>'
+        '</div>'
+        f'<div class="prob-bar-bg"><div class="prob-bar-fg {hi}" style="width:{pct:.4f}%;"></div></div>'
+        '</div>'
+    )
+
+
+def prob_list_html(prob_list: list[tuple[str, float]], highlight_label: str | None = None) -> str:
+    """확률 막대 전체를 한 번의 st.markdown으로 그리기 위한 HTML."""
+    return "".join(prob_card_html(lbl, p, lbl == highlight_label) for lbl, p in prob_list)
+
+
+def content_panel_html(texts: list[str], image_srcs: list[str], videos: list[tuple[str, str | None]]) -> str:
+    """라벨 콘텐츠(텍스트/이미지/동영상 썸네일) 카드들을 HTML 하나로. videos는 (링크, 썸네일 주소 또는 None).
+
+    매니페스트는 앱 밖에서 편집되는 파일이므로 texts를 포함한 모든 값은 이스케이프해 일반 텍스트로 표시한다.
+    """
+    parts = []
+    if texts:
+        parts.append('<div class="info-grid">' + "".join(
+            f'<div class="card" style="grid-column:span 12;"><h4>텍스트</h4><div>{escape(t)}</div></div>'
+            for t in texts) + '</div>')
+    if image_srcs:
+        parts.append('<div class="info-grid">' + "".join(
+            f'<div class="card" style="grid-column:span 4;"><h4>이미지</h4>'
+            f'<img src="{escape(src)}" class="thumb" loading="lazy" /></div>'
+            for src in image_srcs) + '</div>')
+    if videos:
+        cards = []
+        for v, thumb in videos:
+            v = escape(v)
+            if thumb:
+                cards.append(f'<div class="card" style="grid-column:span 6;"><h4>동영상</h4>'
+                             f'<a href="{v}" target="_blank" class="thumb-wrap">'
+                             f'<img src="{escape(thumb)}" class="thumb" loading="lazy"/><div class="play"></div></a>'
+                             f'<div class="helper">{v}</div></div>')
+            else:
+                cards.append(f'<div class="card" style="grid-column:span 6;"><h4>동영상</h4>'
+                             f'<a href="{v}" target="_blank">{v}</a></div>')
+        parts.append('<div class="info-grid">' + "".join(cards) + '</div>')
+    return "".join(parts)
@@ -0,0 +1,109 @@
+import zipfile
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from batch_predict import count_uploaded_images, iter_uploaded_images, predict_batches
+
+LABELS = ["cat", "dog"]
+
+
+class Upload:
+    def __init__(self, name, data):
+        self.name, self._data = name, data
+
+    def getvalue(self):
+        return self._data
+
+
+def _png(color=(255, 0, 0)):
+    buf = BytesIO()
+    Image.new("RGB", (32, 32), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _zip(members: dict):
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _predict_fn(items):
+    return np.tile(np.array([0.2, 0.8], dtype=np.float32), (len(items), 1))
+
+
+def _run(files):
+    rows = []
+    for batch in predict_batches(iter_uploaded_images(files), LABELS, _predict_fn, batch_size=2, workers=1):
+        rows.extend(batch)
+    return {r["file"]: r for r in rows}
+
+
+def test_zip_members_are_expanded_and_filtered():
+    files = [Upload("a.png", _png()),
+             Upload("set.zip", _zip({"x.png": _png(), "notes.txt": b"hi", "__MACOSX/._x.png": b"",
+                                     "sub/y.jpg": _png()}))]
+    assert count_uploaded_images(files) == 3
+    assert [name for name, _ in iter_uploaded_images(files)] == ["a.png", "set.zip/x.png", "set.zip/sub/y.jpg"]
+
+
+def test_corrupt_zip_becomes_error_row():
+    files = [Upload("broken.zip", b"not a zip at all"), Upload("renamed.ZIP", _png()), Upload("ok.png", _png())]
+    assert count_uploaded_images(files) == 3
+    rows = _run(files)
+    assert rows["broken.zip"]["error"].startswith("BadZipFile")
+    assert rows["renamed.ZIP"]["error"].startswith("BadZipFile")
+    assert rows["ok.png"]["label"] == "dog" and rows["ok.png"]["error"] == ""
+
+
+def test_bad_member_does_not_stop_archive():
+    data = bytearray(_zip({"a.png": _png(), "b.png": _png((0, 0, 255))}))
+    first = bytes(data).index(b"IDAT")  # a.png 내용을 망가뜨려 CRC 오류를 낸다
+    data[first + 10] ^= 0xFF
+    rows = _run([Upload("set.zip", bytes(data))])
+    assert rows["set.zip/a.png"]["error"]
+    assert rows["set.zip/b.png"]["label"] == "dog"
+
+
+def test_undecodable_image_becomes_error_row():
+    rows = _run([Upload("bad.jpg", b"\xff\xd8garbage"), Upload("ok.png", _png())])
+    assert rows["bad.jpg"]["error"]
+    assert rows["ok.png"]["prob"] == np.float32(0.8)
+
+
+def test_per_image_exception_from_predict_fn_becomes_error_row():
+    from inference_service import Overloaded
+
+    def flaky(items):
+        return [Overloaded("queue full (1)") if i == 0 else np.array([0.9, 0.1]) for i in range(len(items))]
+
+    files = [Upload("a.png", _png()), Upload("b.png", _png((0, 255, 0)))]
+    rows = {}
+    for batch in predict_batches(iter_uploaded_images(files), LABELS, flaky, batch_size=2, workers=1):
+        rows.update((r["file"], r) for r in batch)
+    assert rows["a.png"]["error"] == "Overloaded: queue full (1)"
+    assert rows["b.png"]["label"] == "cat"
+
+
+def test_oversized_zip_member_is_rejected_before_decompressing(monkeypatch):
+    import batch_predict
+
+    monkeypatch.setattr(batch_predict, "MAX_MEMBER_BYTES", 1024)
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("bomb.png", b"\0" * 10_000)  # 작게 압축되지만 풀면 상한을 넘는다
+        zf.writestr("ok.png", _png())
+    read, orig_read = [], zipfile.ZipFile.read
+
+    def spy_read(self, info, *args):
+        read.append(info.filename)
+        return orig_read(self, info, *args)
+
+    monkeypatch.setattr(zipfile.ZipFile, "read", spy_read)
+    rows = _run([Upload("set.zip", buf.getvalue())])
+    assert rows["set.zip/bomb.png"]["error"].startswith("ValueError: member too large")
+    assert rows["set.zip/ok.png"]["label"] == "dog"
+    assert read == ["ok.png"]
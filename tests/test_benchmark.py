@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import benchmark
+from benchmark import compare
+
+
+def _case(stage, params, p95, tput):
+    return {"stage": stage, "params": params, "p95_ms": p95, "throughput_per_s": tput}
+
+
+def _run(*cases):
+    return {"meta": {"peak_rss_mb": 100.0}, "results": list(cases)}
+
+
+BASE = _run(_case("decode_full", {"format": "jpeg", "resolution": "640x480", "bytes": 1000}, 2.0, 500.0),
+            _case("predict", {"threads": 1, "concurrency": 1}, 10.0, 100.0))
+
+
+def test_encoded_bytes_are_not_part_of_the_key():
+    head = _run(_case("decode_full", {"format": "jpeg", "resolution": "640x480", "bytes": 1234}, 200.0, 5.0),
+                _case("predict", {"threads": 1, "concurrency": 1}, 10.0, 100.0))
+    rows, regressions, missing = compare(BASE, head)
+    assert missing == [] and len(rows) == 4
+    assert {(r["stage"], r["metric"]) for r in regressions} == {("decode_full", "p95_ms"),
+                                                                ("decode_full", "throughput_per_s")}
+
+
+def test_within_threshold_is_not_a_regression():
+    head = _run(_case("decode_full", {"format": "jpeg", "resolution": "640x480", "bytes": 1000}, 2.1, 480.0),
+                _case("predict", {"threads": 1, "concurrency": 1}, 9.0, 120.0))
+    rows, regressions, missing = compare(BASE, head, max_regression=0.10)
+    assert regressions == [] and missing == [] and len(rows) == 4
+
+
+def test_missing_base_case_is_reported():
+    head = _run(_case("predict", {"threads": 1, "concurrency": 1}, 10.0, 100.0))
+    _, _, missing = compare(BASE, head)
+    assert missing == [{"stage": "decode_full", "params": BASE["results"][0]["params"]}]
+
+
+@pytest.mark.parametrize("head_results,expected", [
+    (BASE["results"], 0),
+    (BASE["results"][1:], 1),  # 빠진 케이스
+    ([_case("other", {}, 1.0, 1.0)], 1),  # 비교 0건
+])
+def test_cli_exit_code(tmp_path, head_results, expected):
+    base_path, head_path = tmp_path / "base.json", tmp_path / "head.json"
+    base_path.write_text(json.dumps(BASE))
+    head_path.write_text(json.dumps(_run(*head_results)))
+    assert benchmark.main(["compare", str(base_path), str(head_path)]) == expected
+
+
+def test_cli_fails_on_regression(tmp_path):
+    head = _run(_case("decode_full", {"format": "jpeg", "resolution": "640x480", "bytes": 999}, 200.0, 500.0),
+                BASE["results"][1])
+    (tmp_path / "b.json").write_text(json.dumps(BASE))
+    (tmp_path / "h.json").write_text(json.dumps(head))
+    assert benchmark.main(["compare", str(tmp_path / "b.json"), str(tmp_path / "h.json")]) == 1
+
+
+def test_summary_has_no_per_case_rss():
+    row = benchmark.summarize("x", {}, [1.0, 2.0, 3.0], 0.006)
+    assert "peak_rss_mb" not in row and row["n"] == 3
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from engines import preprocess
+
+
+def _rows_image(w, h):
+    """행마다 값이 다른 이미지 (행 i의 모든 픽셀 = i * 4)."""
+    arr = np.repeat((np.arange(h, dtype=np.uint8) * 4)[:, None], w, axis=1)
+    return Image.fromarray(np.stack([arr] * 3, axis=-1))
+
+
+def _meta(**kw):
+    return {"transform": "Resize", "size": [64, 64], "method": "pad", "pad_mode": "reflection", **kw}
+
+
+def test_pad_reflection_mirrors_without_repeating_edge():
+    out = preprocess(_rows_image(64, 32), _meta())[0]  # 64x32 → 위아래 16행씩 채움, 리사이즈 없음
+    col = out[:, 0].astype(int)
+    assert list(col[16:48]) == [i * 4 for i in range(32)]
+    assert col[15] == 1 * 4 and col[0] == 16 * 4
+    assert col[48] == 30 * 4
+
+
+@pytest.mark.parametrize("pad_mode,top,bottom", [("zeros", 0, 0), ("border", 0, 31 * 4)])
+def test_pad_modes(pad_mode, top, bottom):
+    out = preprocess(_rows_image(64, 32), _meta(pad_mode=pad_mode))[0]
+    assert out[0, 0] == top and out[63, 0] == bottom
+
+
+def test_crop_takes_center():
+    img = Image.fromarray(np.tile(np.arange(64, dtype=np.uint8)[None, :, None], (32, 1, 3)))
+    out = preprocess(img, _meta(method="crop", size=[32, 32]))
+    assert out.shape == (3, 32, 32)
+    assert list(out[0, 0]) == list(range(16, 48))
+
+
+def test_squish_resizes_whole_image():
+    img = _rows_image(100, 40)
+    out = preprocess(img, _meta(method="squish", size=[50, 20]))
+    np.testing.assert_array_equal(out, np.asarray(img.resize((50, 20), Image.BILINEAR)).transpose(2, 0, 1))
+
+
+def test_random_resized_crop_uses_val_xtra_center_crop():
+    img = _rows_image(120, 90)
+    meta = {"transform": "RandomResizedCrop", "size": [64, 64], "val_xtra": 0.14}
+    expected = img.resize((80, 80), Image.BILINEAR).crop((8, 8, 72, 72))  # xtra = ceil(64*.14/8)*8 = 16
+    np.testing.assert_array_equal(preprocess(img, meta), np.asarray(expected).transpose(2, 0, 1))
+
+
+def test_size_is_width_height():
+    out = preprocess(_rows_image(300, 200), _meta(method="squish", size=[48, 32]))
+    assert out.shape == (3, 32, 48)
+
+
+def test_old_meta_without_transform_or_pad_mode():
+    out = preprocess(_rows_image(64, 32), {"size": [64, 64], "method": "pad"})
+    assert out[0, 0, 0] == 0  # 예전 내보내기와 같은 0 채움
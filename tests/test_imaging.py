@@ -0,0 +1,100 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from imaging import decode_for_model, decode_image, load_pil_from_bytes
+
+
+def _encode(img: Image.Image, fmt: str, **opts) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format=fmt, **opts)
+    return buf.getvalue()
+
+
+def _gradient(w, h):
+    gx, gy = np.meshgrid(np.linspace(0, 255, w), np.linspace(0, 255, h))
+    return Image.fromarray(np.stack([gx, gy, (gx + gy) / 2], axis=-1).astype(np.uint8))
+
+
+def _palette_png(w=1200, h=1000):
+    return _encode(_gradient(w, h).quantize(64), "PNG")
+
+
+def _palette_png_with_transparency(w=1200, h=1000):
+    img = _gradient(w, h).quantize(64)
+    return _encode(img, "PNG", transparency=0)
+
+
+def _bilevel_tiff(w=1200, h=1000):
+    return _encode(_gradient(w, h).convert("1"), "TIFF")
+
+
+def _gray16_tiff(w=1200, h=1000):
+    arr = (np.linspace(0, 65535, w * h).reshape(h, w)).astype(np.uint16)
+    return _encode(Image.fromarray(arr), "TIFF")
+
+
+SOURCES = {
+    "palette_png": _palette_png,
+    "palette_png_transparency": _palette_png_with_transparency,
+    "bilevel_tiff": _bilevel_tiff,
+    "gray16_tiff": _gray16_tiff,
+    "rgba_png": lambda: _encode(_gradient(1200, 1000).convert("RGBA"), "PNG"),
+    "jpeg": lambda: _encode(_gradient(1200, 1000), "JPEG", quality=90),
+}
+
+
+@pytest.mark.parametrize("name", sorted(SOURCES))
+def test_decode_image_handles_all_modes(name):
+    b = SOURCES[name]()
+    pil = decode_image(b, 224)
+    assert pil.mode == "RGB"
+    assert pil.info["source_size"] == (1200, 1000)
+    assert 224 <= min(pil.size) < 2 * 224 + 8  # JPEG draft 후에도 짧은 변 >= min_side
+
+
+@pytest.mark.parametrize("name", sorted(SOURCES))
+def test_decode_for_model_display_path(name):
+    model_img, display = decode_for_model(SOURCES[name](), 224)
+    assert model_img.mode == display.mode == "RGB"
+    assert min(model_img.size) >= 224
+    assert max(display.size) <= 800
+
+
+@pytest.mark.parametrize("name", ["palette_png", "bilevel_tiff", "gray16_tiff"])
+def test_reduced_decode_matches_full_decode(name):
+    b = SOURCES[name]()
+    full = load_pil_from_bytes(b).reduce(4)
+    reduced = decode_image(b, 250)
+    assert reduced.size == full.size
+    diff = np.abs(np.asarray(reduced, dtype=np.int16) - np.asarray(full, dtype=np.int16))
+    assert diff.mean() < 2.0
+
+
+def test_exif_orientation_applied_after_reduce():
+    img = _gradient(1200, 600)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 90도 회전
+    pil = decode_image(_encode(img, "JPEG", exif=exif), 200)
+    w, h = pil.size
+    assert h > w
+    assert pil.info["source_size"] == (1200, 600)
+
+
+def test_no_min_side_keeps_full_resolution():
+    pil = decode_image(_palette_png(300, 200))
+    assert pil.size == (300, 200) and pil.mode == "RGB"
+
+
+@pytest.mark.parametrize("name", sorted(SOURCES) + ["jpeg_12mp"])
+@pytest.mark.parametrize("target", [224, 336])
+def test_model_image_is_the_same_on_every_path(name, target):
+    """단일 이미지(decode_for_model)와 일괄/서버/parity(decode_image)가 같은 모델 입력을 만든다."""
+    b = _encode(_gradient(4032, 3024), "JPEG", quality=90) if name == "jpeg_12mp" else SOURCES[name]()
+    model_img, display = decode_for_model(b, target)
+    ref = decode_image(b, target)
+    assert model_img.size == ref.size
+    np.testing.assert_array_equal(np.asarray(model_img), np.asarray(ref))
+    assert max(display.size) == 800 or min(display.size) >= 400
@@ -0,0 +1,160 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from io import BytesIO
+from urllib import request as urlrequest
+from urllib.error import HTTPError
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inference_service import REMOTE_ERRORS, InferenceClient, InferenceService, error_message, make_handler
+
+
+class FakeEngine:
+    name = "fake"
+    labels = ["cat", "dog"]
+    input_size = 32
+    model_id = "fake:1"
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def predict_probs(self, pils):
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return np.tile(np.array([0.3, 0.7], dtype=np.float32), (len(pils), 1))
+
+
+def _png(color=(255, 0, 0)):
+    buf = BytesIO()
+    Image.new("RGB", (64, 64), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def serve():
+    started = []
+
+    def start(engine):
+        service = InferenceService(engine, max_wait_ms=1)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service, timeout=5))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        started.append((server, service))
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server, service in started:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def _post(url, data):
+    req = urlrequest.Request(url + "/predict", data=data, headers={"Content-Type": "application/octet-stream"})
+    try:
+        with urlrequest.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_predict_ok(serve):
+    url = serve(FakeEngine())
+    client = InferenceClient(url)
+    pred, idx, probs = client.predict(_png())
+    assert (pred, idx) == ("dog", 1)
+    np.testing.assert_allclose(probs, [0.3, 0.7])
+
+
+def test_undecodable_body_is_400(serve):
+    url = serve(FakeEngine())
+    code, body = _post(url, b"definitely not an image")
+    assert code == 400
+    assert "cannot decode image" in body["error"]
+
+
+def test_model_error_is_500_not_disconnect(serve):
+    url = serve(FakeEngine(fail=True))
+    code, body = _post(url, _png())
+    assert code == 500
+    assert "model exploded" in body["error"]
+    # 서버는 계속 응답한다
+    with urlrequest.urlopen(url + "/healthz", timeout=5) as resp:
+        assert json.loads(resp.read()) == {"ok": True}
+
+
+def test_client_batch_returns_per_image_errors(serve):
+    client = InferenceClient(serve(FakeEngine()))
+    results = client.predict_probs([_png(), b"broken", _png((0, 0, 255))], return_exceptions=True)
+    assert isinstance(results[1], HTTPError) and results[1].code == 400
+    np.testing.assert_allclose(results[0], [0.3, 0.7])
+    np.testing.assert_allclose(results[2], [0.3, 0.7])
+    with pytest.raises(HTTPError):
+        client.predict_probs([_png(), b"broken"])
+
+
+def test_error_message_for_remote_failures(serve):
+    client = InferenceClient(serve(FakeEngine()))
+    with pytest.raises(REMOTE_ERRORS) as info:
+        client.predict(b"broken")
+    assert error_message(info.value).startswith("HTTP 400: cannot decode image")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(None))
+    port = server.server_address[1]
+    server.server_close()  # 아무도 듣지 않는 포트
+    with pytest.raises(REMOTE_ERRORS) as info:
+        InferenceClient(f"http://127.0.0.1:{port}")
+    assert error_message(info.value).startswith("connection failed:")
+
+
+def test_malformed_content_length_is_400(serve):
+    import http.client
+
+    url = serve(FakeEngine())
+    host, port = url.rsplit("/", 1)[-1].split(":")
+    conn = http.client.HTTPConnection(host, int(port), timeout=5)
+    conn.putrequest("POST", "/predict")
+    conn.putheader("Content-Length", "abc")
+    conn.endheaders()
+    resp = conn.getresponse()
+    assert resp.status == 400
+    assert json.loads(resp.read()) == {"error": "invalid Content-Length"}
+    conn.close()
+
+
+@pytest.mark.parametrize("engine,data,error", [(FakeEngine(), b"broken", "BadImage"),
+                                               (FakeEngine(fail=True), _png(), "RuntimeError: model exploded")])
+def test_failed_request_is_logged_with_error(engine, data, error, caplog):
+    from metrics import REQUEST_ERRORS, configure
+
+    configure(True)
+    service = InferenceService(engine, max_wait_ms=1)
+    try:
+        before = REQUEST_ERRORS._values.get("service", 0)
+        with caplog.at_level("INFO", logger="ai3.request"), pytest.raises(Exception):
+            service.predict(data, timeout=5)
+    finally:
+        service.close()
+        configure(False)
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "ai3.request"]
+    assert len(records) == 1 and records[0]["error"].startswith(error)
+    assert REQUEST_ERRORS._values["service"] == before + 1
+
+
+def test_cache_hit_finishes_trace_once(caplog):
+    from metrics import configure
+
+    configure(True)
+    service = InferenceService(FakeEngine(), max_wait_ms=1)
+    try:
+        with caplog.at_level("INFO", logger="ai3.request"):
+            service.predict(_png(), timeout=5)
+            service.predict(_png(), timeout=5)
+    finally:
+        service.close()
+        configure(False)
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "ai3.request"]
+    assert [r["cache_hit"] for r in records] == [False, True]
+    assert "error" not in records[0] and "error" not in records[1]
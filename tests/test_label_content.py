@@ -0,0 +1,229 @@
+import base64
+import itertools
+import json
+import os
+import threading
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from label_content import ContentManifest, MediaCache, yt_id_from_url, yt_thumb
+
+LABELS = ["jordan", "curry", "james"]
+
+
+def _jpeg(w=640, h=480, color=(200, 30, 30)):
+    buf = BytesIO()
+    Image.new("RGB", (w, h), color).save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+_MTIMES = itertools.count(1_000_000_000_000_000_000, 1_000_000_000)
+
+
+def _write_manifest(path, entries):
+    path.write_text(json.dumps({"labels": entries}), encoding="utf-8")
+    t = next(_MTIMES)  # 파일시스템 mtime 해상도와 상관없이 쓸 때마다 mtime이 달라지도록
+    os.utime(path, ns=(t, t))
+
+
+class FakeFetch:
+    def __init__(self, data=None, fail=False):
+        self.data, self.fail, self.calls = data or _jpeg(), fail, []
+        self.gate = None
+
+    def __call__(self, url):
+        self.calls.append(url)
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        if self.fail:
+            raise OSError("network down")
+        return self.data
+
+
+# ======================
+# 유튜브
+# ======================
+@pytest.mark.parametrize("url", ["https://www.youtube.com/watch?v=dQw4w9WgXcQ", "https://youtu.be/dQw4w9WgXcQ",
+                                 "https://www.youtube.com/embed/dQw4w9WgXcQ?start=3"])
+def test_youtube_ids(url):
+    assert yt_id_from_url(url) == "dQw4w9WgXcQ"
+    assert yt_thumb(url) == "https://img.youtube.com/vi/dQw4w9WgXcQ/hqdefault.jpg"
+
+
+def test_youtube_non_video():
+    assert yt_id_from_url("https://example.com/") is None and yt_thumb("") is None
+
+
+# ======================
+# 매니페스트
+# ======================
+def test_manifest_label_and_index_entries(tmp_path):
+    path = tmp_path / "labels.json"
+    _write_manifest(path, [
+        {"label": "jordan", "texts": ["a", "", "b", "c", "d"], "images": ["x.jpg"]},
+        {"index": 2, "videos": ["https://youtu.be/dQw4w9WgXcQ"]},
+    ])
+    m = ContentManifest(str(path))
+    assert m.get("jordan", LABELS) == (["a", "b", "c"], ["x.jpg"], [])  # 빈 값 제외, 최대 3개
+    assert m.get("james", LABELS) == ([], [], ["https://youtu.be/dQw4w9WgXcQ"])
+    assert m.get("curry", LABELS) == ([], [], [])
+    assert m.validate(LABELS) == ["콘텐츠가 없는 라벨: curry"]
+
+
+def test_manifest_validation_against_vocab(tmp_path):
+    path = tmp_path / "labels.json"
+    _write_manifest(path, [
+        {"label": "lebron"},
+        {"index": 7},
+        {"texts": ["no key"]},
+        "not an object",
+        {"label": "jordan"},
+        {"index": 0},
+    ])
+    problems = ContentManifest(str(path)).validate(LABELS)
+    assert any("`lebron`" in p for p in problems)
+    assert any(p.startswith("항목 1") for p in problems)
+    assert any(p.startswith("항목 2") for p in problems)
+    assert any(p.startswith("항목 3") for p in problems)
+    assert any("중복" in p and "jordan" in p for p in problems)
+    assert problems[-1] == "콘텐츠가 없는 라벨: curry, james"
+
+
+def test_manifest_missing_or_invalid_file(tmp_path):
+    missing = ContentManifest(str(tmp_path / "nope.json"))
+    assert missing.get("jordan", LABELS) == ([], [], [])
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json", encoding="utf-8")
+    problems = ContentManifest(str(bad)).validate(LABELS)
+    assert problems[0].startswith(str(bad))
+
+
+def test_manifest_hot_reload_on_mtime_change(tmp_path):
+    path = tmp_path / "labels.json"
+    _write_manifest(path, [{"label": "jordan", "texts": ["old"]}])
+    m = ContentManifest(str(path))
+    assert m.get("jordan", LABELS)[0] == ["old"]
+    _write_manifest(path, [{"label": "jordan", "texts": ["new"]}, {"label": "curry", "texts": ["c"]}])
+    assert m.get("jordan", LABELS)[0] == ["new"]
+    assert m.get("curry", LABELS)[0] == ["c"]
+    os.remove(path)
+    assert m.get("jordan", LABELS) == ([], [], [])
+
+
+def test_manifest_resolution_is_cached_per_vocab(tmp_path):
+    path = tmp_path / "labels.json"
+    _write_manifest(path, [{"index": 0, "texts": ["t"]}])
+    m = ContentManifest(str(path))
+    assert m.resolved(LABELS) is m.resolved(list(LABELS))
+    assert m.get("other", ["other"])[0] == ["t"]  # 다른 vocab이면 index가 다르게 해석된다
+
+
+def test_media_sources(tmp_path):
+    path = tmp_path / "labels.json"
+    _write_manifest(path, [{"label": "jordan", "images": ["a.jpg"],
+                            "videos": ["https://youtu.be/dQw4w9WgXcQ", "https://example.com/x"]}])
+    assert ContentManifest(str(path)).media_sources(LABELS) == [
+        "a.jpg", "https://img.youtube.com/vi/dQw4w9WgXcQ/hqdefault.jpg"]
+
+
+# ======================
+# 미디어 캐시
+# ======================
+def _cache(tmp_path, **kw):
+    kw.setdefault("fetch", FakeFetch())
+    return MediaCache(str(tmp_path / "cache"), base_dir=str(tmp_path), **kw)
+
+
+def test_remote_image_fetched_once_and_resized(tmp_path):
+    fetch = FakeFetch(_jpeg(2000, 1500))
+    cache = _cache(tmp_path, fetch=fetch, width=200)
+    url = cache.url("https://example.com/big.jpg")
+    assert url.startswith("app/static/media_cache/") and url.endswith(".jpg")
+    assert cache.url("https://example.com/big.jpg") == url
+    assert fetch.calls == ["https://example.com/big.jpg"]
+    with Image.open(os.path.join(cache.cache_dir, os.path.basename(url))) as im:
+        assert max(im.size) <= 200
+
+
+def test_data_uri_and_relative_path_sources(tmp_path):
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "local.jpg").write_bytes(_jpeg())
+    data_uri = "data:image/jpeg;base64," + base64.b64encode(_jpeg(color=(0, 0, 255))).decode("ascii")
+    fetch = FakeFetch()
+    cache = _cache(tmp_path, fetch=fetch, url_prefix=None)
+    for src in ("media/local.jpg", data_uri):
+        out = cache.url(src)
+        assert out.startswith("data:image/jpeg;base64,")
+        Image.open(BytesIO(base64.b64decode(out.split(",", 1)[1]))).verify()
+    assert fetch.calls == []
+    assert cache.url("media/missing.jpg") == "media/missing.jpg"  # 실패 → 원래 경로
+    assert cache.url("data:image/jpeg;base64,AAAA") is None  # 깨진 data URI는 표시하지 않음
+
+
+def test_eviction_is_bounded_by_bytes(tmp_path):
+    cache = _cache(tmp_path, width=300, max_bytes=10 ** 9)
+    paths = [cache.thumbnail_path(f"https://example.com/{i}.jpg") for i in range(4)]
+    for i, p in enumerate(paths):  # 0번이 가장 오래된 파일
+        os.utime(p, (1000 + i, 1000 + i))
+    one = os.path.getsize(paths[0])  # 같은 원본 → 썸네일 크기도 같다
+    cache.max_bytes = int(one * 2.5)
+    newest = cache.thumbnail_path("https://example.com/4.jpg")
+    left = [p for p in paths + [newest] if os.path.exists(p)]
+    assert left == [paths[3], newest]
+    assert sum(map(os.path.getsize, left)) <= cache.max_bytes
+
+
+def test_evicted_file_is_rebuilt(tmp_path):
+    fetch = FakeFetch()
+    cache = _cache(tmp_path, fetch=fetch)
+    url = cache.url("https://example.com/a.jpg")
+    os.remove(os.path.join(cache.cache_dir, os.path.basename(url)))
+    assert cache.url("https://example.com/a.jpg") == url
+    assert len(fetch.calls) == 2
+
+
+def test_failed_fetch_is_retried_after_ttl(tmp_path, monkeypatch):
+    fetch = FakeFetch(fail=True)
+    cache = _cache(tmp_path, fetch=fetch, retry_after=60)
+    now = [1000.0]
+    monkeypatch.setattr("label_content.time.monotonic", lambda: now[0])
+    src = "https://example.com/a.jpg"
+    assert cache.url(src) == src
+    assert cache.url(src) == src
+    assert len(fetch.calls) == 1  # TTL 동안은 다시 받지 않음
+    fetch.fail = False
+    now[0] += 61
+    assert cache.url(src).startswith("app/static/media_cache/")
+    assert len(fetch.calls) == 2
+
+
+def test_prefetch_runs_in_background_and_dedups(tmp_path):
+    fetch = FakeFetch()
+    fetch.gate = threading.Event()
+    cache = _cache(tmp_path, fetch=fetch)
+    srcs = ["https://example.com/a.jpg", "https://example.com/b.jpg", "https://example.com/a.jpg", None]
+    futs = cache.prefetch(srcs)
+    assert len(futs) == 2
+    assert cache.prefetch(srcs) == []  # 받는 중이면 다시 예약하지 않음
+    # 아직 받는 중: block=False는 기다리지 않고 원본 URL을 돌려준다
+    assert cache.url("https://example.com/a.jpg", block=False) == "https://example.com/a.jpg"
+    fetch.gate.set()
+    for f in futs:
+        f.result(5)
+    assert cache.url("https://example.com/a.jpg", block=False).startswith("app/static/media_cache/")
+    assert cache.prefetch(srcs) == []
+    assert sorted(fetch.calls) == ["https://example.com/a.jpg", "https://example.com/b.jpg"]
+
+
+def test_non_blocking_url_schedules_fetch(tmp_path):
+    fetch = FakeFetch()
+    cache = _cache(tmp_path, fetch=fetch)
+    src = "https://example.com/c.jpg"
+    assert cache.url(src, block=False) == src
+    fut = cache._pending.get(src)
+    if fut is not None:
+        fut.result(5)
+    assert cache.url(src, block=False).startswith("app/static/media_cache/")
+    assert fetch.calls == [src]
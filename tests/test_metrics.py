@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+import metrics
+from metrics import Counter, Histogram
+
+# Prometheus 텍스트 형식 한 줄: 이름{라벨="값",...} 숫자
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\\n])*",?)*\})? \S+$')
+
+
+def _assert_valid(lines):
+    for line in lines:
+        assert line.startswith("# ") or SAMPLE_LINE.match(line), line
+
+
+@pytest.mark.parametrize("label,escaped", [
+    ('a"b', 'a\\"b'),
+    ("back\\slash", "back\\\\slash"),
+    ("two\nlines", "two\\nlines"),
+    ("plain", "plain"),
+])
+def test_counter_label_values_are_escaped(label, escaped):
+    c = Counter("t_total", "test", "label")
+    c.inc(label)
+    lines = c.render()
+    _assert_valid(lines)
+    assert lines[-1] == f't_total{{label="{escaped}"}} 1'
+
+
+def test_histogram_render():
+    h = Histogram("t_seconds", "test", (0.1, 1.0), "stage")
+    h.observe(0.05, 'de"code')
+    h.observe(0.5, 'de"code')
+    h.observe(5.0, 'de"code')
+    lines = h.render()
+    _assert_valid(lines)
+    assert 't_seconds_bucket{stage="de\\"code",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="de\\"code",le="1"} 2' in lines
+    assert 't_seconds_bucket{stage="de\\"code",le="+Inf"} 3' in lines
+    assert 't_seconds_count{stage="de\\"code"} 3' in lines
+
+
+def test_disabled_metrics_use_null_trace():
+    metrics.configure(False)
+    trace = metrics.start_request("app")
+    assert trace is metrics.NULL_TRACE
+    with trace.span("decode"):
+        pass
+    assert trace.finish() is None
+
+
+def test_trace_records_stages_and_exports_valid_text():
+    metrics.configure(True)
+    try:
+        trace = metrics.start_request("test")
+        with trace.span("decode"):
+            pass
+        with trace.span("decode"):
+            pass
+        trace.set(label='odd "label"\n', cache_hit=False, image_px=1000, image_bytes=100)
+        record = trace.finish()
+    finally:
+        metrics.configure(False)
+    assert record["source"] == "test" and set(record["stages_ms"]) == {"decode"}
+    text = metrics.render_prometheus()
+    _assert_valid(text.splitlines())
+    assert 'ai3_predictions_total{label="odd \\"label\\"\\n"}' in text
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from inference_service import MicroBatcher, Overloaded
+
+
+class Recorder:
+    """batch_fn: 받은 배치 크기를 기록하고 각 항목을 두 배로 돌려준다. gate가 있으면 열릴 때까지 대기."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.sizes = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def __call__(self, items):
+        self.entered.set()
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        self.sizes.append(len(items))
+        return [x * 2 for x in items]
+
+
+@pytest.fixture
+def batchers():
+    made = []
+
+    def make(*args, **kwargs):
+        b = MicroBatcher(*args, **kwargs)
+        made.append(b)
+        return b
+
+    yield make
+    for b in made:
+        if b._thread.is_alive():
+            b.close()
+
+
+def test_groups_up_to_max_batch(batchers):
+    gate = threading.Event()
+    fn = Recorder(gate)
+    b = batchers(fn, max_batch=4, max_wait_ms=50, max_queue=64)
+    first = b.submit(0)
+    assert fn.entered.wait(2)  # 첫 항목이 처리 중인 동안 10개가 쌓인다
+    futs = [b.submit(i) for i in range(1, 11)]
+    gate.set()
+    assert [f.result(2) for f in [first] + futs] == [i * 2 for i in range(11)]
+    assert fn.sizes == [1, 4, 4, 2]
+    assert b.stats()["batches"] == 4 and b.stats()["items"] == 11
+
+
+def test_waits_up_to_max_wait_for_more_items(batchers):
+    fn = Recorder()
+    b = batchers(fn, max_batch=8, max_wait_ms=300, max_queue=64)
+    f1 = b.submit(1)
+    time.sleep(0.05)
+    f2 = b.submit(2)  # 첫 항목의 대기 시간 안에 도착 → 같은 배치
+    assert (f1.result(2), f2.result(2)) == (2, 4)
+    assert fn.sizes == [2]
+
+
+def test_flushes_partial_batch_after_max_wait(batchers):
+    fn = Recorder()
+    b = batchers(fn, max_batch=8, max_wait_ms=20, max_queue=64)
+    t0 = time.perf_counter()
+    assert b.submit(5).result(2) == 10
+    assert time.perf_counter() - t0 < 1.0
+    assert fn.sizes == [1]
+
+
+def test_overloaded_when_queue_full(batchers):
+    gate = threading.Event()
+    fn = Recorder(gate)
+    b = batchers(fn, max_batch=1, max_wait_ms=0, max_queue=2)
+    running = b.submit(0)
+    assert fn.entered.wait(2)
+    queued = [b.submit(1), b.submit(2)]
+    with pytest.raises(Overloaded):
+        b.submit(3)
+    assert b.stats()["rejected"] == 1
+    gate.set()
+    assert [f.result(2) for f in [running] + queued] == [0, 2, 4]
+
+
+def test_batch_fn_error_fails_every_future_in_batch(batchers):
+    def boom(items):
+        raise RuntimeError("model failed")
+
+    b = batchers(boom, max_batch=4, max_wait_ms=50)
+    futs = [b.submit(i) for i in range(3)]
+    for f in futs:
+        with pytest.raises(RuntimeError, match="model failed"):
+            f.result(2)
+    assert b.submit(9).exception(2) is not None  # 오류 뒤에도 계속 동작
+
+
+def test_close_rejects_queued_requests(batchers):
+    gate = threading.Event()
+    fn = Recorder(gate)
+    b = batchers(fn, max_batch=1, max_wait_ms=0, max_queue=8)
+    running = b.submit(0)
+    assert fn.entered.wait(2)
+    queued = [b.submit(i) for i in range(1, 4)]
+    closer = threading.Thread(target=b.close)
+    closer.start()
+    while not b._stop.is_set():
+        time.sleep(0.001)
+    gate.set()
+    closer.join(5)
+    assert running.result(2) == 0  # 처리 중이던 배치는 끝까지
+    for f in queued:
+        assert isinstance(f.exception(2), Overloaded)
+    with pytest.raises(Overloaded):
+        b.submit(99)
+
+
+def test_short_result_list_fails_every_future(batchers):
+    b = batchers(lambda items: [0] * (len(items) - 1), max_batch=4, max_wait_ms=50)
+    futs = [b.submit(i) for i in range(3)]
+    for f in futs:
+        with pytest.raises(RuntimeError, match=r"returned \d+ results for \d+ inputs"):
+            f.result(2)
@@ -0,0 +1,88 @@
+import json
+import sys
+import types
+
+import pytest
+
+import model_loader
+from model_loader import ensure_model_file, file_sha256
+
+GOOD = b"complete model bytes" * 100
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """gdown.download 대신 GOOD을 쓰는 가짜 모듈. 호출된 URL 목록을 돌려준다."""
+    calls = []
+
+    def download(url, output, quiet=False):
+        calls.append(url)
+        with open(output, "wb") as fh:
+            fh.write(GOOD)
+        return output
+
+    monkeypatch.setitem(sys.modules, "gdown", types.SimpleNamespace(download=download))
+    return calls
+
+
+def _sidecar(path):
+    with open(str(path) + ".sha256", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def test_downloads_when_missing_and_writes_sidecar(tmp_path, downloads):
+    path = tmp_path / "model.pkl"
+    ensure_model_file("id", str(path))
+    assert path.read_bytes() == GOOD and len(downloads) == 1
+    assert _sidecar(path)["sha256"] == file_sha256(str(path))
+    ensure_model_file("id", str(path))  # 사이드카가 맞으면 다시 받지 않는다
+    assert len(downloads) == 1
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_unverified_file_without_check_is_downloaded_again(tmp_path, downloads):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(GOOD[:50])  # 예전 방식으로 받다가 끊긴 파일
+    ensure_model_file("id", str(path))
+    assert path.read_bytes() == GOOD and len(downloads) == 1
+
+
+def test_unverified_file_that_fails_check_is_downloaded_again(tmp_path, downloads):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(GOOD[:50])
+
+    def check(p):
+        raise EOFError("Ran out of input")
+
+    ensure_model_file("id", str(path), check=check)
+    assert path.read_bytes() == GOOD and len(downloads) == 1
+
+
+def test_unverified_file_that_passes_check_is_kept(tmp_path, downloads):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"hand-placed model")
+    checked = []
+    ensure_model_file("id", str(path), check=checked.append)
+    assert checked == [str(path)] and downloads == []
+    assert _sidecar(path)["sha256"] == file_sha256(str(path))
+    ensure_model_file("id", str(path))  # 이제 사이드카로 확인됨
+    assert downloads == []
+
+
+def test_stale_sidecar_is_not_trusted(tmp_path, downloads):
+    path = tmp_path / "model.pkl"
+    ensure_model_file("id", str(path))
+    path.write_bytes(b"modified")  # 크기/mtime이 기록과 다름
+    ensure_model_file("id", str(path))
+    assert path.read_bytes() == GOOD and len(downloads) == 2
+
+
+def test_expected_hash(tmp_path, downloads):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"other model")
+    ensure_model_file("id", str(path), sha256=model_loader.hashlib.sha256(GOOD).hexdigest())
+    assert path.read_bytes() == GOOD
+    with pytest.raises(RuntimeError, match="checksum mismatch"):
+        ensure_model_file("id", str(tmp_path / "other.pkl"), sha256="0" * 64)
+    assert not (tmp_path / "other.pkl").exists()
+    assert not list(tmp_path.glob("*.part"))
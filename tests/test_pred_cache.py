@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from pred_cache import PredictionCache, _entry_nbytes, cache_key
+
+
+def _value(n_classes=4, label="a"):
+    return label, 0, np.full(n_classes, 1.0 / n_classes, dtype=np.float32)
+
+
+def test_cache_key_depends_on_model_id():
+    assert cache_key(b"img", "m1") == cache_key(b"img", "m1")
+    assert cache_key(b"img", "m1") != cache_key(b"img", "m2")
+    assert cache_key(b"img", "m1") != cache_key(b"img2", "m1")
+
+
+def test_put_returns_normalized_copy():
+    cache = PredictionCache()
+    probs = np.array([0.25, 0.75])
+    pred, idx, out = cache.put("k", 123, np.int64(1), probs)
+    assert (pred, idx) == ("123", 1)
+    assert out.dtype == np.float32
+    probs[0] = 9.0
+    assert cache.get("k")[2][0] == pytest.approx(0.25)
+
+
+def test_item_bound_evicts_least_recently_used():
+    cache = PredictionCache(max_items=2)
+    cache.put("a", *_value())
+    cache.put("b", *_value())
+    assert cache.get("a") is not None  # a가 최근 사용 → b가 먼저 밀려남
+    cache.put("c", *_value())
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_bound_evicts():
+    size = _entry_nbytes(_value(n_classes=100))
+    cache = PredictionCache(max_items=100, max_bytes=size * 2 + size // 2)
+    for k in "abc":
+        cache.put(k, *_value(n_classes=100))
+    assert list(cache._data) == ["b", "c"]
+    assert cache.stats()["bytes"] == size * 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_oversized_or_disabled_entries_are_not_stored():
+    big = PredictionCache(max_bytes=10)
+    assert big.put("k", *_value())[0] == "a"
+    assert "k" not in big
+    off = PredictionCache(max_items=0)
+    off.put("k", *_value())
+    assert len(off) == 0
+
+
+def test_replacing_key_keeps_byte_count():
+    cache = PredictionCache()
+    cache.put("k", *_value())
+    before = cache.stats()["bytes"]
+    cache.put("k", *_value(label="b"))
+    assert cache.stats()["bytes"] == before
+    assert cache.get("k")[0] == "b"
+
+
+def test_hit_miss_counters():
+    cache = PredictionCache()
+    assert cache.get("x") is None
+    cache.put("x", *_value())
+    cache.get("x")
+    cache.get("x")
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["items"]) == (2, 1, 1)
+    assert s["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_get_or_compute_calls_compute_once():
+    cache = PredictionCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "cat", 2, [0.1, 0.2, 0.7]
+
+    first = cache.get_or_compute("k", compute)
+    second = cache.get_or_compute("k", compute)
+    assert len(calls) == 1
+    assert first[:2] == second[:2] == ("cat", 2)
+    np.testing.assert_allclose(second[2], [0.1, 0.2, 0.7], rtol=1e-6)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_get_or_compute_does_not_cache_errors():
+    cache = PredictionCache()
+
+    def boom():
+        raise RuntimeError("model failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", boom)
+    assert "k" not in cache
@@ -0,0 +1,54 @@
+import re
+
+import numpy as np
+import pytest
+
+from render_html import content_panel_html, prob_card_html, prob_list_html, sorted_probs
+
+LABELS = ["cat", "dog", "bird"]
+
+
+def test_sorted_probs_descending_and_stable():
+    out = sorted_probs(LABELS, np.array([0.2, 0.5, 0.3], dtype=np.float32))
+    assert [lbl for lbl, _ in out] == ["dog", "bird", "cat"]
+    assert [p for _, p in out] == pytest.approx([0.5, 0.3, 0.2])
+    assert all(type(p) is float for _, p in out)
+    assert [lbl for lbl, _ in sorted_probs(LABELS, [0.25, 0.5, 0.25])] == ["dog", "cat", "bird"]  # 동률은 원래 순서
+
+
+def test_prob_list_is_one_string_with_one_highlight():
+    prob_list = sorted_probs(LABELS, [0.2, 0.5, 0.3])
+    html = prob_list_html(prob_list, "bird")
+    assert html == "".join(prob_card_html(lbl, p, lbl == "bird") for lbl, p in prob_list)
+    assert html.count('class="prob-card"') == 3
+    assert html.count("highlight") == 1
+    cards = re.findall(r'<div class="prob-card">.*?</div></div></div>', html)
+    assert [re.search(r"<strong>(.*?)</strong>", c).group(1) for c in cards] == ["dog", "bird", "cat"]
+    assert "highlight" in cards[1]
+    assert "<span>30.00%</span>" in cards[1] and "width:30.0000%" in cards[1]
+
+
+def test_prob_list_without_highlight():
+    assert "highlight" not in prob_list_html(sorted_probs(LABELS, [0.2, 0.5, 0.3]))
+
+
+def test_label_is_escaped():
+    html = prob_list_html([("<b>x</b>", 1.0)], "<b>x</b>")
+    assert "<b>" not in html and "&lt;b&gt;x&lt;/b&gt;" in html
+    assert "highlight" in html
+
+
+def test_content_panel_escapes_manifest_values():
+    html = content_panel_html(
+        ["<script>alert(1)</script>", "plain"],
+        ['x.jpg" onerror="alert(1)'],
+        [('https://youtu.be/a"b', "thumb.jpg"), ("https://example.com/<v>", None)])
+    assert "<script>" not in html and "&lt;script&gt;alert(1)&lt;/script&gt;" in html
+    assert 'onerror="' not in html
+    assert 'href="https://youtu.be/a&quot;b"' in html
+    assert "https://example.com/&lt;v&gt;" in html
+    assert html.count('class="card"') == 5
+
+
+def test_content_panel_empty():
+    assert content_panel_html([], [], []) == ""